@@ -200,6 +200,46 @@ class BuildQt(Command):
         self.compile_ui_files()
 
 
+class BuildIcons(Command):
+
+    description = "Write the tinted action and upgrade slot icon variants"
+
+    boolean_options = []
+    user_options = []
+
+    def initialize_options(self):
+        pass
+
+    def finalize_options(self):
+        pass
+
+    def run(self):
+        from x_wing_squad_builder.tinted_icons import build_tinted_icons, DEFAULT_RESOURCES_DIR, TINTED_DIR_NAME
+        log.set_verbosity(1)
+        count = build_tinted_icons(DEFAULT_RESOURCES_DIR)
+        log.info(f'{count} tinted icons in {DEFAULT_RESOURCES_DIR / TINTED_DIR_NAME}')
+
+
+class BuildCards(Command):
+
+    description = "Write the downscaled pilot and upgrade card image levels"
+
+    boolean_options = []
+    user_options = []
+
+    def initialize_options(self):
+        pass
+
+    def finalize_options(self):
+        pass
+
+    def run(self):
+        from x_wing_squad_builder.card_pyramid import build_card_pyramid, DEFAULT_RESOURCES_DIR, PYRAMID_DIR_NAME
+        log.set_verbosity(1)
+        count = build_card_pyramid(DEFAULT_RESOURCES_DIR)
+        log.info(f'{count} card levels in {DEFAULT_RESOURCES_DIR / PYRAMID_DIR_NAME}')
+
+
 class CleanLocal(Command):
 
     description = "Clean the local project directory"
@@ -298,6 +338,8 @@ class BuildExe(Command):
 
     def run(self):
         self.run_command("build_qt")
+        self.run_command("build_icons")
+        self.run_command("build_cards")
         self.run_build_exe()
 
 
@@ -352,6 +394,8 @@ class BuildInstaller(Command):
 class MyBuild(distutils_build.build):
     def run(self):
         self.run_command("build_qt")
+        self.run_command("build_icons")
+        self.run_command("build_cards")
         distutils_build.build.run(self)
 
 
@@ -394,6 +438,8 @@ setup(
     cmdclass={
         'build': MyBuild,
         'build_qt': BuildQt,
+        'build_icons': BuildIcons,
+        'build_cards': BuildCards,
         'build_exe': BuildExe,
         'build_installer': BuildInstaller,
         'clean': MyClean,
@@ -0,0 +1,46 @@
+from PIL import Image
+
+from x_wing_squad_builder.card_pyramid import (build_card_level, build_card_pyramid, card_level, card_level_image,
+                                               card_level_path)
+
+
+def write_card(path, size=(300, 420)):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    Image.new("RGB", size, (200, 100, 50)).save(path)
+
+
+def test_card_level():
+    assert card_level(0.1) == "thumbnail"
+    assert card_level(0.25) == "thumbnail"
+    assert card_level(0.3) == "display"
+    assert card_level(0.5) == "display"
+    assert card_level(0.75) == "full"
+    assert card_level(2.0) == "full"
+
+
+def test_build_card_level(tmp_path):
+    card_path = tmp_path / "pilots" / "luke skywalker.jpg"
+    write_card(card_path)
+    level_path = build_card_level(card_path, "display")
+    assert level_path == card_level_path(card_path, "display") == \
+        tmp_path / "pyramid" / "pilots" / "display" / "luke skywalker.jpg"
+    assert Image.open(level_path).size == (150, 210)
+    assert list(level_path.parent.iterdir()) == [level_path]
+    assert card_level_path(card_path, "full") == card_path
+    assert build_card_level(tmp_path / "pilots" / "missing.jpg", "display") is None
+
+
+def test_card_level_image_falls_back_to_larger_levels(tmp_path):
+    card_path = tmp_path / "upgrades" / "r2 astromech.jpg"
+    write_card(card_path, (420, 300))
+    assert card_level_image(card_path, 0.2) == (card_path, 1.0)
+    build_card_level(card_path, "display")
+    assert card_level_image(card_path, 0.2) == (card_level_path(card_path, "display"), 0.5)
+    assert card_level_image(card_path, 0.6) == (card_path, 1.0)
+
+
+def test_build_card_pyramid(tmp_path):
+    write_card(tmp_path / "pilots" / "luke skywalker.jpg")
+    write_card(tmp_path / "upgrades" / "r2 astromech.jpg", (420, 300))
+    assert build_card_pyramid(tmp_path) == 4
+    assert Image.open(tmp_path / "pyramid" / "upgrades" / "thumbnail" / "r2 astromech.jpg").size == (105, 75)
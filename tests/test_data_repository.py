@@ -0,0 +1,38 @@
+import shutil
+
+import pytest
+
+from x_wing_squad_builder.data_repository import DataRepository
+from x_wing_squad_builder.model.catalog_cache import default_cache_path
+
+
+@pytest.fixture(scope="function")
+def repository(definition_file_path, tmp_path):
+    data_path = tmp_path / "definition.json"
+    shutil.copy(definition_file_path, data_path)
+    return DataRepository(data_path)
+
+
+def test_shared_data(repository: DataRepository):
+    assert repository.xwing.data is repository.data
+    assert repository.upgrades.upgrades_list is repository.data["upgrades"]
+
+
+def test_commit(repository: DataRepository):
+    notifications = []
+    repository.data_changed.connect(lambda: notifications.append(True))
+    old_xwing = repository.xwing
+    repository.data["factions"] = repository.data["factions"][:1]
+    repository.commit()
+
+    assert notifications == [True]
+    assert repository.xwing is not old_xwing
+    assert repository.xwing.faction_names == ["first order"]
+    assert default_cache_path(repository.data_path).exists()
+    assert DataRepository(repository.data_path).xwing.faction_names == ["first order"]
+
+
+def test_reload_discards_uncommitted(repository: DataRepository):
+    repository.data["factions"] = repository.data["factions"][:1]
+    repository.reload()
+    assert len(repository.xwing.faction_names) == 7
@@ -1,7 +1,8 @@
 import pytest
 from x_wing_squad_builder.definition_form import DefinitionForm
+from x_wing_squad_builder.data_repository import DataRepository
 
 
 @pytest.fixture(scope="module")
 def definition_form(definition_file_path):
-    return DefinitionForm(definition_file_path)
+    return DefinitionForm(DataRepository(definition_file_path))
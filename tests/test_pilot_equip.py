@@ -106,3 +106,34 @@ def test_available_actions(xwing: XWing, faction_name, ship_name, pilot_name):
     expected.append(fake_action)
 
     assert pilot_equip.actions == expected
+
+
+def test_filtered_upgrades_by_slot(xwing: XWing, upgrades: Upgrades, pilot_equip: PilotEquip):
+    filtered = [
+        {"name": "one", "upgrade_slot_types": ["talent"]},
+        {"name": "two", "upgrade_slot_types": ["cannon", "cannon"]},
+        {"name": "three", "upgrade_slot_types": ["talent", "cannon"]},
+    ]
+    pilot_equip.filtered_upgrades = filtered
+    assert [upgrade["name"] for upgrade in pilot_equip.filtered_upgrades_by_slot["talent"]] == ["one", "three"]
+    cannon_upgrades = upgrades.filtered_upgrades_by_pilot_and_slot(pilot_equip, "cannon")
+    assert [upgrade["name"] for upgrade in cannon_upgrades] == ["two", "three"]
+    assert upgrades.filtered_upgrades_by_pilot_and_slot(pilot_equip, "crew") == []
+
+
+def test_derived_values_invalidated_on_equip(xwing: XWing, upgrades: Upgrades):
+    ship = xwing.get_ship("galactic empire", "lambda-class t-4a shuttle")
+    pilot_equip = PilotEquip(ship, ship.get_pilot_data("omicron group pilot"))
+    assert not hasattr(pilot_equip, "__dict__")
+    before_slots = pilot_equip.upgrade_slots
+    before_cost = pilot_equip.cost_with_upgrades
+    assert pilot_equip.upgrade_slots is before_slots
+
+    upgrade_dict = upgrades.get_upgrade("ion cannon")
+    pilot_equip.equip_upgrade(upgrade_dict["upgrade_slot_types"], "ion cannon", 6, upgrade_dict)
+    assert pilot_equip.cost_with_upgrades == before_cost + 6
+    assert len(pilot_equip.available_upgrade_slots) == len(before_slots) - 1
+
+    pilot_equip.unequip_upgrade("ion cannon")
+    assert pilot_equip.cost_with_upgrades == before_cost
+    assert pilot_equip.available_upgrade_slots == before_slots
@@ -0,0 +1,34 @@
+from PySide6 import QtGui
+
+from x_wing_squad_builder.pixmap_cache import PixmapCache
+
+
+def image(width: int, height: int = 1) -> QtGui.QImage:
+    return QtGui.QImage(width, height, QtGui.QImage.Format_ARGB32)
+
+
+def test_lru_eviction():
+    cache = PixmapCache(budget=40)
+    cache.put("a", image(4))
+    cache.put("b", image(4))
+    assert cache.size == 32
+    assert cache.get("a") is not None
+    # b is now the least recently used entry
+    cache.put("c", image(4))
+    assert "b" not in cache
+    assert "a" in cache and "c" in cache
+    assert cache.size == 32
+    assert cache.stats["hits"] == 1
+    assert cache.get("b") is None
+    assert cache.misses == 1
+
+
+def test_budget():
+    cache = PixmapCache(budget=16)
+    cache.put("big", image(8))
+    assert len(cache) == 0
+    cache.put("a", image(2))
+    cache.put("a", image(4))
+    assert cache.size == 16
+    cache.budget = 8
+    assert len(cache) == 0 and cache.size == 0
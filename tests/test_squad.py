@@ -0,0 +1,296 @@
+import json
+import subprocess
+import sys
+
+import openpyxl
+import pytest
+
+from x_wing_squad_builder.model.pilot_equip import PilotEquip
+from x_wing_squad_builder.model.squad import Squad
+from x_wing_squad_builder.model.squad_codec import SquadCodec, read_varint, write_varint
+from x_wing_squad_builder.model.squad_spec import apply_auto_includes, build_squad, squad_spec, validate_squad
+from x_wing_squad_builder.model import squad_workbook
+from x_wing_squad_builder.model.squad_workbook import read_squad_workbook, unique_sheet_name, write_squad_workbook
+from x_wing_squad_builder.model.upgrade import Upgrades
+from x_wing_squad_builder.model.xwing import XWing
+
+
+@pytest.fixture(scope="function")
+def empire_squad(xwing: XWing):
+    squad = Squad()
+    pilots = []
+    pilot_ids = []
+    for ship_name, pilot_name in [("lambda-class t-4a shuttle", "omicron group pilot"),
+                                  ("vt-49 decimator", "patrol leader"),
+                                  ("tie%ln fighter", "academy pilot")]:
+        ship = xwing.get_ship("galactic empire", ship_name)
+        pilot_equip = PilotEquip(ship, ship.get_pilot_data(pilot_name))
+        pilot_ids.append(squad.add_pilot(pilot_equip))
+        pilots.append(pilot_equip)
+    return squad, pilots, pilot_ids
+
+
+def filtered_names(upgrade_list):
+    return [upgrade["name"] for upgrade in upgrade_list]
+
+
+def test_refresh_only_invalidated_pilots(upgrades: Upgrades, empire_squad):
+    squad, (shuttle, decimator, fighter), pilot_ids = empire_squad
+    assert len(upgrades.refresh_filtered_upgrades(squad)) == 3
+    assert upgrades.refresh_filtered_upgrades(squad) == []
+
+    # a non unique upgrade only changes the pilot it is equipped to
+    fighter.equip_upgrade(["modification"], "hull upgrade", 3, upgrades.get_upgrade("hull upgrade"))
+    assert upgrades.refresh_filtered_upgrades(squad) == [fighter]
+
+    # darth vader is unique and enables 0-0-0, both crew pilots depend on it
+    shuttle.equip_upgrade(["crew"], "darth vader", 10, upgrades.get_upgrade("darth vader"))
+    assert set(upgrades.refresh_filtered_upgrades(squad)) == {shuttle, decimator}
+    for pilot in (shuttle, decimator, fighter):
+        assert pilot.filtered_upgrades == upgrades.filtered_upgrades_by_pilot(pilot, squad)
+    assert "0-0-0" in filtered_names(decimator.filtered_upgrades)
+    assert "darth vader" not in filtered_names(decimator.filtered_upgrades)
+
+    shuttle.unequip_upgrade("darth vader")
+    assert set(upgrades.refresh_filtered_upgrades(squad)) == {shuttle, decimator}
+    assert "darth vader" in filtered_names(decimator.filtered_upgrades)
+
+
+def test_removed_pilot_invalidates_dependents(upgrades: Upgrades, empire_squad):
+    squad, (shuttle, decimator, fighter), pilot_ids = empire_squad
+    upgrades.refresh_filtered_upgrades(squad)
+    squad.remove_pilot(pilot_ids[2])
+    assert upgrades.refresh_filtered_upgrades(squad) == []
+
+    fighter.equip_upgrade(["modification"], "hull upgrade", 3, upgrades.get_upgrade("hull upgrade"))
+    assert squad.dependencies.dirty == set()
+
+
+def test_uniqueness_registry(upgrades: Upgrades, empire_squad):
+    squad, (shuttle, decimator, fighter), pilot_ids = empire_squad
+    assert squad.pilot_counts["academy pilot"] == 1
+    assert squad.has_name("patrol leader")
+    assert not squad.has_root("darth vader")
+
+    shuttle.equip_upgrade(["crew"], "darth vader", 10, upgrades.get_upgrade("darth vader"))
+    assert squad.has_upgrade("darth vader")
+    assert squad.has_name("darth vader")
+    assert squad.has_root("darth vader")
+
+    shuttle.unequip_upgrade("darth vader")
+    assert not squad.has_upgrade("darth vader")
+    assert not squad.has_root("darth vader")
+
+    shuttle.equip_upgrade(["crew"], "darth vader", 10, upgrades.get_upgrade("darth vader"))
+    squad.remove_pilot(pilot_ids[0])
+    assert not squad.has_root("darth vader")
+    assert not squad.has_name("omicron group pilot")
+    assert squad.pilot_counts["omicron group pilot"] == 0
+
+
+def test_pilot_ids(xwing: XWing):
+    ship = xwing.get_ship("galactic empire", "tie%ln fighter")
+    squad = Squad()
+    first = squad.add_pilot(PilotEquip(ship, ship.get_pilot_data("academy pilot")))
+    second = squad.add_pilot(PilotEquip(ship, ship.get_pilot_data("academy pilot")))
+    assert first != second
+    assert squad.remove_pilot(first)
+    third = squad.add_pilot(PilotEquip(ship, ship.get_pilot_data("academy pilot")))
+    assert third not in (first, second)
+    assert list(squad.squad_dict) == [second, third]
+
+
+def test_model_is_headless():
+    code = ("import sys; import x_wing_squad_builder.model; "
+            "assert not [name for name in sys.modules if name.startswith('PySide6')]")
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+@pytest.fixture(scope="function")
+def empire_spec():
+    return {
+        "name": "empire",
+        "faction": "galactic empire",
+        "pilots": [
+            {"ship": "tie%ln fighter", "pilot": "academy pilot", "upgrades": ["shield upgrade"]},
+            {"ship": "vt-49 decimator", "pilot": "patrol leader", "upgrades": ["informant", "agile gunner"]},
+        ]
+    }
+
+
+def test_build_squad(xwing: XWing, upgrades: Upgrades, empire_spec):
+    squad, errors = build_squad(empire_spec, xwing, upgrades)
+    assert errors == []
+    assert squad.has_upgrade("shield upgrade")
+    assert squad_spec(squad, "empire") == empire_spec
+
+
+def test_build_squad_auto_includes_per_pilot(xwing: XWing, upgrades: Upgrades):
+    spec = {"name": "rebels", "faction": "rebel alliance", "pilots": [
+        {"ship": "t-65 x-wing", "pilot": "red squadron veteran", "upgrades": ["servomotor s-foils"]},
+        {"ship": "t-65 x-wing", "pilot": "blue squadron escort", "upgrades": []},
+    ]}
+    squad, errors = build_squad(spec, xwing, upgrades)
+    assert errors == []
+    for pilot_data in squad.squad_dict.values():
+        assert [upgrade.name for upgrade in pilot_data.equipped_upgrades] == ["servomotor s-foils"]
+
+    # the same as adding the pilots one by one in the squad builder
+    gui_squad = Squad()
+    for pilot_spec in spec["pilots"]:
+        ship = xwing.get_ship(spec["faction"], pilot_spec["ship"])
+        gui_squad.add_pilot(PilotEquip(ship, xwing.get_pilot(spec["faction"], pilot_spec["ship"], pilot_spec["pilot"])))
+        assert len(apply_auto_includes(gui_squad, upgrades)) == 1
+    assert apply_auto_includes(gui_squad, upgrades) == []
+    assert squad_spec(gui_squad, "rebels") == squad_spec(squad, "rebels")
+
+
+def test_validate_squad(xwing: XWing, upgrades: Upgrades, empire_spec):
+    report = validate_squad(empire_spec, xwing, upgrades)
+    assert report["valid"]
+    assert validate_squad(empire_spec, xwing, upgrades, max_points=report["points"] - 1)["valid"] is False
+
+    empire_spec["pilots"][0]["upgrades"].append("no such upgrade")
+    empire_spec["pilots"][1]["upgrades"].append("afterburners")
+    report = validate_squad(empire_spec, xwing, upgrades)
+    assert not report["valid"]
+    assert len(report["errors"]) == 2
+
+
+def test_validate_cli(tmp_path, definition_file_path, empire_spec):
+    (tmp_path / "squads.jsonl").write_text(
+        json.dumps(empire_spec) + "\n" + "{not json\n" + json.dumps({"name": "empty"}) + "\n")
+    output = tmp_path / "report.jsonl"
+    result = subprocess.run([sys.executable, "-m", "x_wing_squad_builder.validate", str(tmp_path / "squads.jsonl"),
+                             str(tmp_path / "missing.json"), "--definition", str(definition_file_path),
+                             "--workers", "1", "-o", str(output)],
+                            capture_output=True, text=True)
+    assert result.returncode == 1
+    reports = [json.loads(line) for line in output.read_text().splitlines()]
+    assert [(report["name"], report["valid"]) for report in reports] == [
+        ("empire", True), (None, False), ("empty", False), (None, False)]
+    assert "Invalid JSON on line 2" in reports[1]["errors"][0]
+    assert "Unable to read" in reports[3]["errors"][0]
+    assert "4 squads validated" in result.stderr
+
+
+def test_validate_cli_unwritable_output(tmp_path, definition_file_path):
+    output = tmp_path / "missing" / "report.jsonl"
+    result = subprocess.run([sys.executable, "-m", "x_wing_squad_builder.validate", "-",
+                             "--definition", str(definition_file_path), "-o", str(output)],
+                            capture_output=True, text=True, input="")
+    assert result.returncode == 2
+    assert "unable to write" in result.stderr
+    assert "Traceback" not in result.stderr
+
+
+def test_batch_notifies_once(xwing: XWing, upgrades: Upgrades, empire_spec):
+    squad = Squad()
+    changes = []
+    squad.add_change_callback(changes.append)
+    build_squad(empire_spec, xwing, upgrades, squad)
+    assert changes == [squad]
+
+    pilot_id = next(iter(squad.squad_dict))
+    squad.get_pilot_data(pilot_id).unequip_upgrade("shield upgrade")
+    assert len(changes) == 2
+    with squad.batch():
+        with squad.batch():
+            squad.remove_pilot(pilot_id)
+        assert len(changes) == 2
+    assert len(changes) == 3
+
+
+def test_read_squad_workbook(tmp_path, xwing: XWing, upgrades: Upgrades, empire_spec):
+    squad, _ = build_squad(empire_spec, xwing, upgrades)
+    filename = tmp_path / "squad.xlsx"
+    squad.export_squad_as_excel(str(filename), "empire")
+
+    workbook = openpyxl.load_workbook(filename)
+    workbook.copy_worksheet(workbook.active)["B1"] = "copy"
+    workbook.create_sheet("notes")["A1"] = "not a squad"
+    workbook.save(filename)
+
+    specs = read_squad_workbook(filename)
+    assert [spec["name"] for spec in specs] == ["empire", "copy"]
+    assert specs[0] == empire_spec
+
+
+def test_write_squad_workbook(tmp_path, xwing: XWing, upgrades: Upgrades, empire_spec):
+    squad, _ = build_squad(empire_spec, xwing, upgrades)
+    filename = tmp_path / "squads.xlsx"
+    progress = []
+    written = write_squad_workbook(str(filename), ((f"empire {i}", squad) for i in range(3)), 3,
+                                   progress_callback=lambda done, total: progress.append((done, total)))
+    assert written == 3
+    assert progress == [(1, 3), (2, 3), (3, 3)]
+    assert openpyxl.load_workbook(filename).sheetnames == ["Summary", "empire 0", "empire 1", "empire 2"]
+    assert [spec["name"] for spec in read_squad_workbook(filename)] == ["empire 0", "empire 1", "empire 2"]
+
+    cancelled = write_squad_workbook(str(filename), [("empire", squad)] * 3, is_cancelled=lambda: len(progress) > 4,
+                                     progress_callback=lambda done, total: progress.append((done, total)))
+    assert cancelled is None
+    assert not filename.exists()
+
+
+def test_write_squad_workbook_sheet_limit(tmp_path, monkeypatch, xwing: XWing, upgrades: Upgrades, empire_spec):
+    squad, _ = build_squad(empire_spec, xwing, upgrades)
+    filename = tmp_path / "squads.xlsx"
+    monkeypatch.setattr(squad_workbook, "MAX_SQUAD_SHEETS", 2)
+    with pytest.raises(ValueError):
+        write_squad_workbook(str(filename), [("empire", squad)] * 3, 3)
+    # squads of unknown number are counted while writing
+    with pytest.raises(ValueError):
+        write_squad_workbook(str(filename), (("empire", squad) for _ in range(3)))
+    assert not filename.exists()
+
+
+def test_unique_sheet_name():
+    used = {"summary"}
+    assert unique_sheet_name("Summary", used) == "Summary (2)"
+    assert unique_sheet_name("a/b:c", used) == "a_b_c"
+    assert unique_sheet_name("", used) == "Squad"
+    assert len(unique_sheet_name("x" * 40, used)) == 31
+    assert unique_sheet_name("x" * 40, used) == "x" * 27 + " (2)"
+
+
+def test_squad_codec(xwing: XWing, upgrades: Upgrades, empire_spec):
+    codec = SquadCodec(xwing, upgrades)
+    squad, _ = build_squad(empire_spec, xwing, upgrades)
+    code = codec.encode(squad, "empire")
+    assert codec.decode_spec(code) == empire_spec
+    decoded, errors = codec.decode(code)
+    assert errors == []
+    assert squad_spec(decoded, "empire") == empire_spec
+
+    empty = {"name": None, "faction": None, "pilots": []}
+    assert codec.decode_spec(codec.encode_spec(empty)) == empty
+    with pytest.raises(ValueError):
+        codec.decode_spec(code[:-2])
+    with pytest.raises(ValueError):
+        codec.decode_bytes(bytes([SquadCodec.VERSION + 1]) + codec.encode_bytes(empire_spec)[1:])
+    with pytest.raises(ValueError):
+        codec.decode_bytes(bytes([SquadCodec.VERSION, 0, 0]) + codec.encode_bytes(empire_spec)[3:])
+
+
+def test_squad_codec_iter_squads(xwing: XWing, upgrades: Upgrades, empire_spec):
+    codec = SquadCodec(xwing, upgrades)
+    code = codec.encode_spec(empire_spec)
+    unnamed = codec.encode_spec(dict(empire_spec, name=None))
+    squads = list(codec.iter_squads([code + "\n", "\n", "not a code\n", unnamed]))
+    assert [name for name, _ in squads] == ["empire", "Squad 3"]
+    assert squad_spec(squads[1][1], None)["pilots"] == empire_spec["pilots"]
+
+
+def test_varint_round_trip():
+    blob = bytearray()
+    values = [0, 1, 127, 128, 300, 2 ** 40]
+    for value in values:
+        write_varint(value, blob)
+    position = 0
+    decoded = []
+    for _ in values:
+        value, position = read_varint(bytes(blob), position)
+        decoded.append(value)
+    assert decoded == values
+    assert position == len(blob)
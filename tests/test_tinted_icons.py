@@ -0,0 +1,42 @@
+import os
+
+import numpy as np
+from PIL import Image
+
+from x_wing_squad_builder.tinted_icons import build_tinted_icons, tint_image, tinted_icon, tinted_icon_path
+
+
+def write_icon(path):
+    path.parent.mkdir(parents=True)
+    Image.new("RGBA", (2, 2), (255, 255, 255, 255)).save(path)
+
+
+def test_tint_image():
+    image = Image.new("RGBA", (1, 1), (255, 255, 255, 255))
+    assert np.array(tint_image(image, "red"))[0, 0].tolist() == [255, 0, 0, 255]
+    assert np.array(tint_image(image, "purple"))[0, 0].tolist() == [255, 0, 255, 255]
+    assert np.array(tint_image(image, "white"))[0, 0].tolist() == [255, 255, 255, 255]
+
+
+def test_tinted_icon_written_once(tmp_path):
+    icon_path = tmp_path / "actions" / "focus.png"
+    write_icon(icon_path)
+    tinted_path = tinted_icon(icon_path, "red")
+    assert tinted_path == tinted_icon_path(icon_path, "red") == tmp_path / "tinted" / "actions" / "focus_red.png"
+    assert np.array(Image.open(tinted_path))[0, 0].tolist() == [255, 0, 0, 255]
+
+    mtime = tinted_path.stat().st_mtime_ns
+    assert tinted_icon(icon_path, "red") == tinted_path
+    assert tinted_path.stat().st_mtime_ns == mtime
+    # a newer source icon is tinted again
+    os.utime(icon_path, ns=(mtime + 10 ** 9, mtime + 10 ** 9))
+    tinted_icon(icon_path, "red")
+    assert tinted_path.stat().st_mtime_ns != mtime
+
+    assert tinted_icon(tmp_path / "actions" / "missing.png", "red") is None
+
+
+def test_build_tinted_icons(tmp_path):
+    write_icon(tmp_path / "actions" / "focus.png")
+    write_icon(tmp_path / "upgrade_slots" / "talent.png")
+    assert build_tinted_icons(tmp_path) == 6
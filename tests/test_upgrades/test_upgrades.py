@@ -9,6 +9,10 @@ from x_wing_squad_builder.model.upgrade_filters import (upgrade_slot_filter, nam
                                                         multiple_name_filter, actions_filter,
                                                         statistics_filter_simple, statistics_filter_adv,
                                                         limit_filter)
+from x_wing_squad_builder.model.restrictions import compile_restrictions
+from x_wing_squad_builder.model.upgrade_index import InvertedIndex, UpgradeIndex
+from x_wing_squad_builder.model.eligibility import EligibilityMatrix
+from x_wing_squad_builder.model.costs import compile_cost, resolve_cost
 
 from .filter_tests import FILTER_TESTS
 
@@ -305,7 +309,7 @@ def pilot_factory(xwing: XWing):
 def test_special_upgrade_crew_out_of_faction(upgrades: Upgrades, pilot_factory, faction_name, ship_name, pilot_name, upgrade_name, added_upgrade):
     pilot_equip: PilotEquip = pilot_factory(faction_name, ship_name, pilot_name)
     squad = Squad()
-    squad.add_pilot("yay", pilot_equip)
+    squad.add_pilot(pilot_equip)
 
     filtered = [upgrade["name"] for upgrade in upgrades.filtered_upgrades_by_pilot(pilot_equip, squad)]
     assert added_upgrade not in filtered
@@ -323,7 +327,7 @@ def test_special_upgrade_crew_out_of_faction(upgrades: Upgrades, pilot_factory,
 def test_special_upgrade_crew_in_faction(upgrades: Upgrades, pilot_factory, faction_name, ship_name, pilot_name, upgrade_name):
     pilot_equip: PilotEquip = pilot_factory(faction_name, ship_name, pilot_name)
     squad = Squad()
-    squad.add_pilot("yay", pilot_equip)
+    squad.add_pilot(pilot_equip)
 
     filtered = [upgrade["name"] for upgrade in upgrades.filtered_upgrades_by_pilot(pilot_equip, squad)]
     assert upgrade_name in filtered
@@ -331,7 +335,145 @@ def test_special_upgrade_crew_in_faction(upgrades: Upgrades, pilot_factory, fact
 # TODO: Write test for if a pilot equivalent is equipped, you get the special inclusions above
 
 
+def test_compiled_restrictions_drop_no_ops(upgrades: Upgrades):
+    # clan training only restricts keywords, everything else in its template is empty or null
+    restrictions = upgrades.get_compiled_restrictions("clan training")
+    assert [restriction.key for restriction in restrictions] == ["keywords"]
 
 
+@pytest.mark.parametrize(
+    "restriction_values, compiled_keys", [
+        pytest.param({"limit": 0, "factions": [], "hull": {"low": None, "high": None}}, [], id="all no-ops"),
+        pytest.param({"limit": 1, "pilot_limit": {"low": 1, "high": None}}, ["limit"], id="pilot limit ignored"),
+        pytest.param({"hull": {"low": 3, "high": None}, "ships": ["tie%ln fighter"]}, ["hull", "ships"],
+                     id="ranges and names"),
+        pytest.param({"shield": {"shield": {"low": None, "high": None}, "recharge": {"low": None, "high": None}}},
+                     [], id="empty advanced statistic"),
+        pytest.param({"shield": {"shield": {"low": 1, "high": None}, "recharge": {"low": None, "high": None}}},
+                     ["shield"], id="advanced statistic"),
+    ]
+)
+def test_compile_restrictions(restriction_values, compiled_keys):
+    upgrade = {"name": "fake", "restrictions": restriction_values}
+    assert [restriction.key for restriction in compile_restrictions(upgrade)] == compiled_keys
 
 
+@pytest.mark.parametrize(
+    "upgrade, dynamic_keys", [
+        pytest.param({"restrictions": {"limit": 1, "hull": {"low": 3, "high": None}}}, ["limit"], id="limit"),
+        pytest.param({"restrictions": {"factions": ["rebel alliance"]}}, [], id="factions"),
+        pytest.param({"restrictions": {"factions": ["rebel alliance"]}, "squad_include": ["ezra bridger"]},
+                     ["factions"], id="squad include"),
+        pytest.param({"restrictions": {"other_equipped_upgrades": ["os-1 arsenal loadout"]}},
+                     ["other_equipped_upgrades"], id="other equipped upgrades"),
+    ]
+)
+def test_dynamic_restrictions(upgrade, dynamic_keys):
+    upgrade["name"] = "fake"
+    assert [restriction.key for restriction in compile_restrictions(upgrade) if restriction.dynamic] == dynamic_keys
+
+
+def test_static_eligibility_cached(upgrades: Upgrades, pilot_factory):
+    pilot_equip: PilotEquip = pilot_factory("galactic empire", "lambda-class t-4a shuttle", "omicron group pilot")
+    squad = Squad()
+    squad.add_pilot(pilot_equip)
+    static = upgrades.static_eligible_upgrades(pilot_equip)
+
+    pilot_equip.equip_upgrade(pilot_equip.upgrade_slots, "darth vader", 10, upgrades.get_upgrade("darth vader"))
+    filtered = [upgrade["name"] for upgrade in upgrades.filtered_upgrades_by_pilot(pilot_equip, squad)]
+    assert "0-0-0" in filtered
+    assert upgrades.static_eligible_upgrades(pilot_equip) is static
+
+
+def test_slot_eligibility_matches_slot_filter(upgrades: Upgrades, pilot_factory):
+    pilot_equip: PilotEquip = pilot_factory("galactic empire", "lambda-class t-4a shuttle", "omicron group pilot")
+
+    def expected():
+        slots = pilot_equip.upgrade_slots
+        return [i for i in upgrades.static_eligible_upgrades(pilot_equip)
+                if upgrade_slot_filter(upgrades.get_upgrade_slots(upgrades.upgrades_list[i]), slots)]
+
+    eligible = upgrades.slot_eligible_upgrades(pilot_equip)
+    assert eligible == expected()
+    assert upgrades.slot_eligible_upgrades(pilot_equip) is eligible
+
+    # equipped upgrades can add or remove slots, the cache is keyed on the resulting slots
+    pilot_equip.equip_upgrade(pilot_equip.upgrade_slots, "darth vader", 10, upgrades.get_upgrade("darth vader"))
+    assert upgrades.slot_eligible_upgrades(pilot_equip) == expected()
+
+
+def test_inverted_index():
+    index = InvertedIndex()
+    index.add(0, [])
+    index.add(1, ["rebel alliance"])
+    index.add(2, ["galactic empire", "first order"])
+    assert index.candidates(["rebel alliance"]) == {0, 1}
+    assert index.candidates(["first order"]) == {0, 2}
+    assert index.candidates(["resistance"]) == {0}
+
+
+@pytest.mark.parametrize(
+    "faction_name, ship_name, pilot_name", [
+        pytest.param("galactic empire", "lambda-class t-4a shuttle", "omicron group pilot"),
+        pytest.param("first order", r"tie%ba interceptor", "major vonreg"),
+        pytest.param("scum and villainy", "customized yt-1300 light freighter", "freighter captain"),
+    ]
+)
+def test_upgrade_index_candidates(upgrades: Upgrades, pilot_factory, faction_name, ship_name, pilot_name):
+    pilot_equip: PilotEquip = pilot_factory(faction_name, ship_name, pilot_name)
+    index = UpgradeIndex(upgrades.upgrades_list)
+    candidates = index.candidates(pilot_equip)
+    candidate_names = [upgrades.upgrades_list[i]["name"] for i in candidates]
+    filtered_names = [upgrade["name"] for upgrade in upgrades.filtered_upgrades_by_pilot(pilot_equip, Squad())]
+
+    assert len(candidates) < len(upgrades.upgrades_list)
+    assert set(filtered_names) <= set(candidate_names)
+
+
+def test_eligibility_matrix(xwing: XWing, upgrades: Upgrades):
+    mode = Upgrades.settings.mode
+    matrix = EligibilityMatrix.from_catalog(xwing, upgrades.upgrades_list, mode)
+    assert matrix.matrix.shape == (len(xwing.pilot_keys), len(upgrades.upgrades_list))
+
+    for faction_name, ship_name, pilot_name in xwing.pilot_keys:
+        ship = next(ship for ship in xwing.get_faction(faction_name).all_ships if ship.ship_name == ship_name)
+        pilot_equip = PilotEquip(ship, ship.get_pilot_data(pilot_name))
+        expected = [upgrade["name"] for upgrade in upgrades.filtered_upgrades_by_pilot(pilot_equip, Squad())]
+        assert matrix.eligible_upgrade_names((faction_name, ship_name, pilot_name)) == expected
+
+    key = ("galactic empire", "lambda-class t-4a shuttle", "omicron group pilot")
+    assert key in matrix.eligible_pilot_keys("passive sensors")
+    assert matrix.eligible_pilot_counts()["passive sensors"] == len(matrix.eligible_pilot_keys("passive sensors"))
+
+
+def test_costed_upgrade_view(upgrades: Upgrades, pilot_factory):
+    pilot_equip: PilotEquip = pilot_factory("galactic empire", "tie%ln fighter", "academy pilot")
+    filtered = upgrades.filtered_upgrades_by_pilot(pilot_equip, Squad())
+    pilot_equip.filtered_upgrades = filtered
+    hull_upgrade = next(upgrade for upgrade in filtered if upgrade["name"] == "hull upgrade")
+    original = upgrades.get_upgrade("hull upgrade")
+
+    assert isinstance(original["cost"], dict)
+    assert hull_upgrade["cost"] == Upgrades.get_filtered_upgrade_cost(original, pilot_equip)
+    assert hull_upgrade.upgrade is original
+    assert hull_upgrade.get("upgrade_slot_types") == ["modification"]
+    assert dict(hull_upgrade) == {**original, "cost": hull_upgrade["cost"]}
+    modifications = [upgrade for upgrade in filtered if "modification" in upgrade["upgrade_slot_types"]]
+    assert upgrades.filtered_upgrades_by_pilot_and_slot(pilot_equip, "modification") == modifications
+
+
+@pytest.mark.parametrize(
+    "faction_name, ship_name, pilot_name", [
+        pytest.param("galactic empire", "tie%ln fighter", "academy pilot", id="small"),
+        pytest.param("galactic empire", "vt-49 decimator", "patrol leader", id="large"),
+    ]
+)
+def test_compiled_variable_costs(upgrades: Upgrades, pilot_factory, faction_name, ship_name, pilot_name):
+    pilot_equip: PilotEquip = pilot_factory(faction_name, ship_name, pilot_name)
+    variable = [upgrade for upgrade in upgrades if type(upgrade["cost"]) is dict]
+    assert {upgrade["cost"]["attribute"] for upgrade in variable} == {"attacks", "initiative", "agility", "base"}
+    for upgrade in variable:
+        cost = upgrade["cost"]
+        expected = cost.get(str(pilot_equip.get_attribute(cost["attribute"])))
+        assert resolve_cost(compile_cost(cost), pilot_equip) == expected
+        assert Upgrades.get_filtered_upgrade_cost(upgrade, pilot_equip) == expected
@@ -2,7 +2,8 @@ import pytest
 
 from x_wing_squad_builder.utils import (contains_number, process_part, prettify_name,
                                         gui_text_encode, gui_text_decode,
-                                        get_pilot_name_from_list_item_text, get_upgrade_name_from_list_item_text, get_upgrade_slot_from_list_item_text)
+                                        get_pilot_name_from_list_item_text, get_upgrade_name_from_list_item_text, get_upgrade_slot_from_list_item_text,
+                                        neighbour_indices, atomic_write_path)
 
 
 def test_contains_number():
@@ -61,3 +62,34 @@ def test_prettify_name():
 def test_get_upgrade_name_from_list_item_text(list_item_text, expected):
     extracted_name = get_upgrade_name_from_list_item_text(list_item_text)
     assert extracted_name == expected
+
+
+@pytest.mark.parametrize(
+    "index, length, distance, expected", [
+        pytest.param(5, 10, 2, [6, 4, 7, 3]),
+        pytest.param(0, 10, 2, [1, 2]),
+        pytest.param(9, 10, 3, [8, 7, 6]),
+        pytest.param(1, 3, 3, [2, 0]),
+        pytest.param(0, 1, 3, []),
+    ]
+)
+def test_neighbour_indices(index, length, distance, expected):
+    assert neighbour_indices(index, length, distance) == expected
+
+
+def test_atomic_write_path(tmp_path):
+    path = tmp_path / "definition.cache"
+    with atomic_write_path(path) as first, atomic_write_path(path) as second:
+        # concurrent writers get temporary files of their own
+        assert first != second and first.parent == second.parent == tmp_path
+        first.write_text("first")
+        second.write_text("second")
+    assert path.read_text() == "first"
+    assert list(tmp_path.iterdir()) == [path]
+
+    with pytest.raises(ValueError):
+        with atomic_write_path(path) as tmp:
+            tmp.write_text("partial")
+            raise ValueError()
+    assert path.read_text() == "first"
+    assert list(tmp_path.iterdir()) == [path]
@@ -0,0 +1,24 @@
+from PySide6 import QtCore
+
+from x_wing_squad_builder.worker import Worker, start_worker
+
+
+def test_start_worker():
+    app = QtCore.QCoreApplication.instance() or QtCore.QCoreApplication([])
+    threadpool = QtCore.QThreadPool()
+    running = set()
+    results = []
+    for value in range(3):
+        worker = Worker(lambda x: x * 2, value)
+        worker.signals.result.connect(lambda result: results.append(result))
+        start_worker(threadpool, worker, running)
+    # only running keeps the workers now
+    del worker
+    assert len(running) == 3
+
+    threadpool.waitForDone()
+    deadline = QtCore.QDeadlineTimer(5000)
+    while running and not deadline.hasExpired():
+        app.processEvents()
+    assert sorted(results) == [0, 2, 4]
+    assert running == set()
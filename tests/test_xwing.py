@@ -1,4 +1,9 @@
+import json
+import shutil
+
 from x_wing_squad_builder.model.xwing import XWing
+from x_wing_squad_builder.model.catalog_cache import default_cache_path
+from x_wing_squad_builder.model.settings_snapshot import Mode
 
 
 FACTIONS = ["first order", "galactic empire", "grand army of the republic",
@@ -49,4 +54,60 @@ def test_get_pilot(xwing: XWing):
     assert test_pilot["name"] == pilot
 
 
+def test_get_pilot_missing(xwing: XWing):
+    assert xwing.get_pilot("first order", r"tie%ba interceptor", "rockandstone") is None
+    assert xwing.get_pilot("first order", "rockandstone", "major vonreg") is None
+    assert xwing.get_pilot("booyah", r"tie%ba interceptor", "major vonreg") is None
+
 
+def test_lookups_are_shared(xwing: XWing):
+    faction = "first order"
+    ship = r"tie%ba interceptor"
+    assert xwing.get_faction(faction) is xwing.get_faction(faction)
+    assert xwing.get_ship(faction, ship) is xwing.get_ship(faction, ship)
+    assert xwing.get_ship(faction, ship) in xwing.get_faction(faction).faction_ships
+
+
+def test_get_ship_huge_only_in_epic(xwing: XWing, monkeypatch):
+    faction = "galactic empire"
+    ship = "gozanti-class cruiser"
+    monkeypatch.setattr(XWing.settings, "mode", Mode.STANDARD)
+    assert xwing.get_ship(faction, ship) is None
+    monkeypatch.setattr(XWing.settings, "mode", Mode.EPIC)
+    assert xwing.get_ship(faction, ship) is xwing.get_faction(faction).get_ship(ship)
+
+
+def test_pilot_keys(xwing: XWing, definition_data: dict):
+    expected = [(faction["name"], ship["name"], pilot["name"])
+                for faction in definition_data["factions"]
+                for ship in faction["ships"]
+                for pilot in ship["pilots"]]
+    assert xwing.pilot_keys == expected
+
+
+def test_launch_xwing_data_cache(definition_file_path, tmp_path):
+    data_path = tmp_path / "definition.json"
+    shutil.copy(definition_file_path, data_path)
+    cache_path = default_cache_path(data_path)
+    assert not cache_path.exists()
+
+    first = XWing.launch_xwing_data(data_path)
+    assert cache_path.exists()
+    second = XWing.launch_xwing_data(data_path)
+    assert second.data == first.data
+    assert second.get_pilot("first order", r"tie%ba interceptor", "major vonreg")["name"] == "major vonreg"
+
+    # changing the source invalidates the cache
+    data = json.loads(data_path.read_text())
+    data["factions"] = data["factions"][:1]
+    data_path.write_text(json.dumps(data))
+    third = XWing.launch_xwing_data(data_path)
+    assert third.faction_names == ["first order"]
+
+
+def test_launch_xwing_data_corrupt_cache(definition_file_path, tmp_path):
+    data_path = tmp_path / "definition.json"
+    shutil.copy(definition_file_path, data_path)
+    default_cache_path(data_path).write_bytes(b"not a pickle")
+    test_xwing = XWing.launch_xwing_data(data_path)
+    assert len(test_xwing.faction_names) == 7
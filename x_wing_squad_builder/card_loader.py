@@ -0,0 +1,132 @@
+from itertools import count
+from pathlib import Path
+
+from PySide6 import QtCore, QtGui
+
+from typing import Callable, Dict, Hashable, Iterable, Optional, Set, Tuple
+
+from .card_pyramid import card_level_image
+from .pixmap_cache import PIXMAP_CACHE, PixmapCache
+from .utils_pyside import cache_qimage, cached_qpixmap, pixmap_cache_key
+from .worker import Worker, start_worker
+
+# how many cards before and after the selected one are prefetched
+PREFETCH_DISTANCE = 3
+# prefetched cards not viewed yet may take up this share of the pixmap cache budget
+PREFETCH_BUDGET_SHARE = 0.25
+# queued card loads run before prefetches
+PREFETCH_PRIORITY = -1
+
+
+class CardLoader(QtCore.QObject):
+    """
+    Decodes card images on a thread pool and hands the pixmaps to a callback on the GUI thread.
+
+    Every load is made for a channel, e.g. the pilot card of the main window.  Only the latest load of a
+    channel is delivered: loads that are superseded before they start are skipped, and loads that finish
+    after being superseded are dropped, so stepping quickly through a list only paints the last card.
+    Cached cards are delivered right away.
+
+    Loads pass the resolution the card is shown at, as a fraction of its full resolution, and the smallest
+    level of the card pyramid holding it is decoded (see card_pyramid).  reload loads the card of a channel
+    again, e.g. at a higher resolution after zooming in.
+
+    Prefetching decodes the cards next to a selection into the pixmap cache at low priority, so stepping
+    through a list hits the cache.  A new prefetch supersedes the prefetches that have not started yet.
+    """
+
+    def __init__(self, threadpool: QtCore.QThreadPool, parent=None):
+        super().__init__(parent)
+        self.threadpool = threadpool
+        self.__tokens = count(1)
+        self.__latest: Dict[Hashable, int] = {}
+        # (channel, level path, level scale, callback) of the loads on the thread pool by token
+        self.__pending: Dict[int, Tuple[Hashable, Path, float, Callable[[QtGui.QPixmap], None]]] = {}
+        # full resolution card of every channel, for reloading it
+        self.__sources: Dict[Hashable, Path] = {}
+        self.__prefetch_generation = 0
+        self.__prefetching = set()
+        # bytes of the prefetched cards that were not viewed yet by pixmap cache key
+        self.__prefetched: Dict[tuple, int] = {}
+        self.__workers: Set[Worker] = set()
+
+    def load(self, channel: Hashable, image_path: Path, callback: Callable[[QtGui.QPixmap], None],
+             resolution: float = 1.0):
+        """loads a card for the channel at resolution, superseding its pending load"""
+        token = next(self.__tokens)
+        self.__latest[channel] = token
+        self.__sources[channel] = image_path
+        level_path, level_scale = card_level_image(image_path, resolution)
+        pixmap = cached_qpixmap(level_path)
+        if pixmap is not None:
+            self.__prefetched.pop(pixmap_cache_key(level_path), None)
+            callback(pixmap)
+            return
+        self.__pending[token] = (channel, level_path, level_scale, callback)
+        worker = Worker(self.decode, channel, token, level_path)
+        # a slot of this object, so the result is handled on the GUI thread
+        worker.signals.result.connect(self.handle_decoded)
+        start_worker(self.threadpool, worker, self.__workers)
+
+    def reload(self, channel: Hashable, callback: Callable[[QtGui.QPixmap], None], resolution: float = 1.0):
+        """loads the card of the channel again at resolution, does nothing if the channel has no card"""
+        image_path = self.__sources.get(channel)
+        if image_path is not None:
+            self.load(channel, image_path, callback, resolution)
+
+    def prefetch(self, image_paths: Iterable[Path], resolution: float = 1.0):
+        """decodes the cards into the pixmap cache in the background at resolution, most wanted first"""
+        self.__prefetch_generation += 1
+        for priority, image_path in enumerate(image_paths):
+            level_path, level_scale = card_level_image(image_path, resolution)
+            if pixmap_cache_key(level_path) in PIXMAP_CACHE or level_path in self.__prefetching:
+                continue
+            self.__prefetching.add(level_path)
+            worker = Worker(self.decode_prefetch, self.__prefetch_generation, level_path, level_scale)
+            worker.signals.result.connect(self.handle_prefetched)
+            start_worker(self.threadpool, worker, self.__workers, PREFETCH_PRIORITY - priority)
+
+    def cancel(self, channel: Hashable):
+        """drops the pending load and the card of a channel"""
+        self.__latest[channel] = next(self.__tokens)
+        self.__sources.pop(channel, None)
+
+    def is_current(self, channel: Hashable, token: int) -> bool:
+        return self.__latest.get(channel) == token
+
+    def decode(self, channel: Hashable, token: int, image_path: Path) -> Tuple[int, Optional[QtGui.QImage]]:
+        """runs on the thread pool, QImage can be used outside the GUI thread unlike QPixmap"""
+        if not self.is_current(channel, token):
+            return token, None
+        return token, QtGui.QImage(str(image_path))
+
+    def decode_prefetch(self, generation: int, image_path: Path,
+                        level_scale: float) -> Tuple[Path, float, Optional[QtGui.QImage]]:
+        if generation != self.__prefetch_generation:
+            return image_path, level_scale, None
+        return image_path, level_scale, QtGui.QImage(str(image_path))
+
+    @QtCore.Slot(object)
+    def handle_prefetched(self, decoded: Tuple[Path, float, Optional[QtGui.QImage]]):
+        image_path, level_scale, qimage = decoded
+        self.__prefetching.discard(image_path)
+        if qimage is None or qimage.isNull() or pixmap_cache_key(image_path) in PIXMAP_CACHE:
+            return
+        # forget the prefetched cards the cache evicted since
+        self.__prefetched = {key: size for key, size in self.__prefetched.items() if key in PIXMAP_CACHE}
+        size = PixmapCache.image_bytes(qimage)
+        if sum(self.__prefetched.values()) + size > PIXMAP_CACHE.budget * PREFETCH_BUDGET_SHARE:
+            return
+        cache_qimage(image_path, qimage, resolution=level_scale)
+        self.__prefetched[pixmap_cache_key(image_path)] = size
+
+    @QtCore.Slot(object)
+    def handle_decoded(self, decoded: Tuple[int, Optional[QtGui.QImage]]):
+        token, qimage = decoded
+        channel, image_path, level_scale, callback = self.__pending.pop(token)
+        if qimage is None:
+            return
+        # cache the card even if it is stale, the user may well come back to it
+        pixmap = cache_qimage(image_path, qimage, resolution=level_scale)
+        if self.is_current(channel, token):
+            callback(pixmap)
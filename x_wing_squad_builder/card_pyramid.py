@@ -0,0 +1,96 @@
+"""
+Downscaled levels of the pilot and upgrade card images.
+
+Cards are mostly shown smaller than their full resolution, so every card gets a thumbnail and a display
+level next to the resources, e.g. resources/pyramid/pilots/display/luke skywalker.jpg, written by
+`python setup.py build_cards`.  The full level is the card image itself.  Loading a card picks the smallest
+level holding at least the resolution it is shown at, which cuts decoding time and pixmap memory.  Levels
+that were not built fall back to the next larger one, so the cards show without the build step too.
+
+    python -m x_wing_squad_builder.card_pyramid [resources dir]
+"""
+import logging
+import sys
+from pathlib import Path
+
+from PIL import Image
+
+from typing import Optional, Tuple
+
+from .utils import atomic_write_path
+
+# fraction of the full resolution held by each level, smallest first
+LEVEL_SCALES = {
+    "thumbnail": 0.25,
+    "display": 0.5,
+    "full": 1.0,
+}
+FULL_LEVEL = "full"
+PYRAMID_DIR_NAME = "pyramid"
+# resource directories holding card images
+CARD_DIRS = ["pilots", "upgrades"]
+JPEG_QUALITY = 90
+DEFAULT_RESOURCES_DIR = Path(__file__).parents[1] / "data" / "resources"
+
+
+def card_level(resolution: float) -> str:
+    """returns the smallest level holding at least resolution, the fraction of full resolution a card is shown at"""
+    for level, scale in LEVEL_SCALES.items():
+        if scale >= resolution:
+            return level
+    return FULL_LEVEL
+
+
+def card_level_path(image_path: Path, level: str) -> Path:
+    """returns where a level of resources/<card dir>/<card> is stored"""
+    image_path = Path(image_path)
+    if level == FULL_LEVEL:
+        return image_path
+    return image_path.parents[1] / PYRAMID_DIR_NAME / image_path.parent.name / level / image_path.name
+
+
+def card_level_image(image_path: Path, resolution: float) -> Tuple[Path, float]:
+    """returns the path and scale of the smallest built level of a card holding at least resolution"""
+    levels = list(LEVEL_SCALES)
+    for level in levels[levels.index(card_level(resolution)):]:
+        level_path = card_level_path(image_path, level)
+        if level == FULL_LEVEL or level_path.exists():
+            return level_path, LEVEL_SCALES[level]
+
+
+def build_card_level(image_path: Path, level: str) -> Optional[Path]:
+    """
+    returns the path of a level of a card, writing it first if it is missing or outdated.
+    returns None if the card does not exist or the level cannot be written.
+    """
+    image_path = Path(image_path)
+    level_path = card_level_path(image_path, level)
+    try:
+        source_mtime = image_path.stat().st_mtime
+        if level_path.exists() and level_path.stat().st_mtime >= source_mtime:
+            return level_path
+        level_path.parent.mkdir(parents=True, exist_ok=True)
+        with Image.open(image_path) as image, atomic_write_path(level_path) as tmp_path:
+            scale = LEVEL_SCALES[level]
+            size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+            image.convert("RGB").resize(size, Image.LANCZOS).save(tmp_path, "JPEG", quality=JPEG_QUALITY)
+    except OSError as e:
+        logging.debug(f"Unable to write card level {level_path}: {e}")
+        return None
+    return level_path
+
+
+def build_card_pyramid(resources_dir: Path = DEFAULT_RESOURCES_DIR) -> int:
+    """writes every missing or outdated downscaled card level, returns the number of levels available"""
+    count = 0
+    for card_dir in CARD_DIRS:
+        for image_path in sorted((Path(resources_dir) / card_dir).glob("*.jpg")):
+            for level in LEVEL_SCALES:
+                if level != FULL_LEVEL and build_card_level(image_path, level) is not None:
+                    count += 1
+    return count
+
+
+if __name__ == "__main__":
+    resources_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_RESOURCES_DIR
+    print(f"{build_card_pyramid(resources_dir)} card levels in {resources_dir / PYRAMID_DIR_NAME}")
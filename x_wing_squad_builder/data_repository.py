@@ -0,0 +1,61 @@
+import json
+import logging
+from pathlib import Path
+
+from PySide6 import QtCore
+
+from .model import XWing, Upgrades
+from .model.catalog_cache import cache_key, default_cache_path, write_cache
+
+
+class DataRepository(QtCore.QObject):
+    """
+    Owns the parsed definition data and the XWing and Upgrades objects built from it.
+
+    Every window works on the same data through this object.  Editors modify `data` in place and
+    call `commit` to persist it, and `data_changed` is emitted whenever the data is reloaded or
+    committed so views can refresh themselves.
+    """
+    data_changed = QtCore.Signal()
+
+    def __init__(self, data_path: Path, parent=None):
+        super().__init__(parent)
+        self.__data_path = Path(data_path)
+        self.__xwing = XWing.launch_xwing_data(self.__data_path)
+        self.__upgrades = Upgrades(self.__xwing.upgrades)
+
+    @property
+    def data_path(self) -> Path:
+        return self.__data_path
+
+    @property
+    def data(self) -> dict:
+        return self.__xwing.data
+
+    @property
+    def xwing(self) -> XWing:
+        return self.__xwing
+
+    @property
+    def upgrades(self) -> Upgrades:
+        return self.__upgrades
+
+    def __set_xwing(self, xwing: XWing):
+        self.__xwing = xwing
+        self.__upgrades = Upgrades(xwing.upgrades)
+        self.data_changed.emit()
+
+    def reload(self):
+        """re-reads the definition file, discarding any uncommitted changes to the data."""
+        self.__set_xwing(XWing.launch_xwing_data(self.data_path))
+
+    def commit(self):
+        """writes the in-memory data to the definition file and rebuilds the catalog from it."""
+        raw = json.dumps(self.data, ensure_ascii=False, indent=4).encode("utf-8")
+        with open(self.data_path, "wb") as file:
+            file.write(raw)
+        logging.info(f"Data successfully written to {self.data_path}")
+        xwing = XWing(self.data)
+        # The data is already in memory, so refresh the cache directly instead of re-parsing on the next load.
+        write_cache(default_cache_path(self.data_path), cache_key(raw), xwing)
+        self.__set_xwing(xwing)
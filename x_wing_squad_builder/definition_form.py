@@ -1,14 +1,13 @@
 from PySide6 import QtWidgets, QtCore, QtGui
 from .ui.definition_form_ui import Ui_DefinitionForm
 
-from .model import XWing, Faction, Ship
+from .model import Faction, Ship
+from .data_repository import DataRepository
 from .model.constants import BASE_SIZES, ARC_TYPES_, ACTION_COLORS, ACTIONS_, UPGRADE_SLOTS_, FACTION_NAMES, KEYWORDS, INVALID
 from .utils import prettify_definition_form_entry
 from .utils_pyside import parse_actions, parse_attacks, arr_to_comma_separated_list, parse_check_box
 
 import logging
-import json
-from pathlib import Path
 
 from typing import List, Optional, Union
 
@@ -17,13 +16,12 @@ class DefinitionForm(QtWidgets.QDialog):
     update_signal = QtCore.Signal()
     form_closed_signal = QtCore.Signal()
 
-    def __init__(self, data_filepath: Path, parent=None):
+    def __init__(self, repository: DataRepository, parent=None):
         super().__init__()
         self.ui = Ui_DefinitionForm()
         self.ui.setupUi(self)
 
-        self.data_filepath = data_filepath
-        self.load_data()
+        self.repository = repository
 
         # This is turned on when editing entries from the viewer, then turned off after the edit is complete
         self.edit_mode = False
@@ -48,9 +46,10 @@ class DefinitionForm(QtWidgets.QDialog):
         self.accepted.connect(self.handle_ok_pressed)
         self.rejected.connect(self.handle_close_pressed)
 
-    def load_data(self):
-        with open(self.data_filepath) as file:
-            self.data = json.load(file)
+    @property
+    def data(self) -> dict:
+        """the shared definition data, edits are persisted with write_data"""
+        return self.repository.data
 
     def check_ship_name(self):
         faction_idx = self.get_faction_index(self.faction_name)
@@ -495,7 +494,7 @@ class DefinitionForm(QtWidgets.QDialog):
         self.edit_upgrade_name = None
 
     def insert_new_entry(self) -> bool:
-        self.xwing = XWing.launch_xwing_data(self.data_filepath)
+        self.xwing = self.repository.xwing
         entry = self.data_entry_template()
         new_faction_name = entry['name']
         new_ship_name = entry['ship']['name']
@@ -522,6 +521,8 @@ class DefinitionForm(QtWidgets.QDialog):
                         self.insert_pilot(
                             new_faction_name, new_ship_name, pilot_data, overwrite=True)
                     else:
+                        # discard the ship update applied above so the shared data stays in sync with the file
+                        self.repository.reload()
                         # returning true is what we use to open the definition form again
                         return True
                 # Otherwise simply append a new pilot
@@ -703,6 +704,8 @@ class DefinitionForm(QtWidgets.QDialog):
         this is used for pilot statistics as they have null values.
         Will set any null to -1
         """
+        # work on a copy, the statistic belongs to the shared definition data
+        stat = dict(stat)
         for key in stat.keys():
             val = stat[key]
             if val is None:
@@ -710,11 +713,7 @@ class DefinitionForm(QtWidgets.QDialog):
         return stat
 
     def write_data(self):
-
-        with open(self.data_filepath, "w", encoding='utf-8') as file:
-            json.dump(self.data, file, ensure_ascii=False, indent=4)
-
-        logging.info(f"Data successfully written to {self.data_filepath}")
+        self.repository.commit()
 
     def handle_ok_pressed(self):
         if not self.valid_entry:
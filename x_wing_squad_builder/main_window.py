@@ -6,17 +6,23 @@ from PySide6 import QtWidgets, QtCore, QtGui
 from x_wing_squad_builder.definition_form import DefinitionForm
 from x_wing_squad_builder.upgrade_form import UpgradeForm
 from x_wing_squad_builder.viewer import Viewer
-from .settings import Settings
-from .worker import Worker
+from .settings import Settings, SettingsSnapshot
+from .worker import Worker, start_worker
+from .card_loader import CardLoader, PREFETCH_DISTANCE
+from .pixmap_cache import MEGABYTE, PIXMAP_CACHE
 from .root_logger_handler import RootLoggerHandler
 from .ui import DarkPalette, IconPath
 from .ui.main_window_ui import Ui_MainWindow
 from .about_window import AboutWindow
 from .settings_window import SettingsWindow
+from .data_repository import DataRepository
 
 from .model import XWing, PilotEquip, Squad, Upgrades
+from .model.squad_codec import SquadCodec
+from .model.squad_spec import apply_auto_includes, build_squad
+from .model.squad_workbook import MAX_SQUAD_SHEETS, read_squad_workbook, write_squad_workbook
 
-from .utils_pyside import (image_path_to_qpixmap, populate_list_widget, update_action_layout,
+from .utils_pyside import (image_path_to_qpixmap, populate_list_widget, update_action_layout, list_widget_neighbours,
                            update_upgrade_slot_layout, treewidget_item_is_top_level,
                            )
 from .utils import (get_upgrade_slot_from_list_item_text, gui_text_decode, prettify_name, gui_text_encode,
@@ -24,10 +30,14 @@ from .utils import (get_upgrade_slot_from_list_item_text, gui_text_decode, prett
 
 from pathlib import Path
 
-from typing import Optional
+from typing import Dict, Iterable, List, Optional, Set
+
+
+PILOT_ID_ROLE = QtCore.Qt.UserRole
+# card loader channels of the main card viewer
+PILOT_CARD = "pilot_card"
+UPGRADE_CARD = "upgrade_card"
 
-from openpyxl import load_workbook
-from openpyxl.utils import get_column_letter
 
 class MainWindow(QtWidgets.QMainWindow):
     """Main Window"""
@@ -38,6 +48,9 @@ class MainWindow(QtWidgets.QMainWindow):
         self.organization_name = "ryanlenardryanlenard, Inc."
 
         self.settings = Settings()
+        # load the persisted settings into the snapshot the model reads
+        snapshot = Settings.snapshot()
+        PIXMAP_CACHE.budget = snapshot.image_cache_size * MEGABYTE
         self.ui = Ui_MainWindow()
         self.ui.setupUi(self)
         self.setWindowTitle(self.application_name)
@@ -47,6 +60,10 @@ class MainWindow(QtWidgets.QMainWindow):
 
         # Setup threadpool
         self.threadpool = QtCore.QThreadPool()
+        # workers on the threadpool, kept until they finished so their signal connections live on
+        self.running_workers: Set[Worker] = set()
+        # card images are decoded on the threadpool
+        self.card_loader = CardLoader(self.threadpool, self)
 
         # To create an async worker
         # worker = Worker(func)
@@ -57,7 +74,7 @@ class MainWindow(QtWidgets.QMainWindow):
         self.settings_window = SettingsWindow()
         self.settings_window.ui.theme_combo_box.currentTextChanged.connect(
             self.check_theme)
-        self.settings_window.saved_signal.connect(self.reload_data)
+        Settings.broadcaster().settings_changed.connect(self.handle_settings_saved)
 
         # Add widgets with icon paths here to be inverted on a theme change.
         self.widgets_with_icons = {
@@ -74,7 +91,10 @@ class MainWindow(QtWidgets.QMainWindow):
         self.ui.action_open_settings_window.triggered.connect(
             self.handle_show_settings_window)
         self.ui.action_export_as_excel.triggered.connect(self.export_excel)
+        self.ui.action_export_squad_codes.triggered.connect(self.export_squad_codes)
         self.ui.action_import_excel.triggered.connect(self.import_excel)
+        self.ui.action_copy_squad_code.triggered.connect(self.copy_squad_code)
+        self.ui.action_paste_squad_code.triggered.connect(self.paste_squad_code)
 
         self.ui.faction_list_widget.itemSelectionChanged.connect(self.update_faction)
         self.ui.ship_list_widget.itemSelectionChanged.connect(self.update_ship)
@@ -84,9 +104,12 @@ class MainWindow(QtWidgets.QMainWindow):
         self.ui.upgrade_list_widget.itemSelectionChanged.connect(self.handle_update_upgrade)
         self.ui.upgrade_list_widget.enter_signal.connect(self.handle_equip_upgrade)
         self.ui.upgrade_list_widget.itemDoubleClicked.connect(self.handle_equip_upgrade)
+        self.ui.main_card_viewer.sharper_card_needed.connect(self.handle_sharper_card_needed)
 
         # Initialize Factions
         self.file_path = self.data_dir / "definition.json"
+        self.repository = DataRepository(self.file_path)
+        self.repository.data_changed.connect(self.refresh_data_views)
 
         # Initialize widgets
         self.ui.ship_name_label.clear()
@@ -119,14 +142,16 @@ class MainWindow(QtWidgets.QMainWindow):
         self.ui.squad_tree_widget.itemDoubleClicked.connect(self.handle_squad_double_click)
 
         self.squad = Squad()
-
-        self.xwing = XWing.launch_xwing_data(self.file_path)
-        self.upgrades = Upgrades(self.xwing.upgrades)
+        self.squad.add_change_callback(self.handle_squad_changed)
+        self.__squad_codec = None
+        self.__squad_codec_upgrades = None
+        # squad tree items by squad pilot id, each top level item stores its pilot id in PILOT_ID_ROLE
+        self.squad_items: Dict[int, QtWidgets.QTreeWidgetItem] = {}
 
         # Set up upgrade viewer
         self.viewer = self.initialize_card_viewer()
 
-        self.reload_data()
+        self.refresh_data_views()
 
         self.update_costs()
 
@@ -135,10 +160,31 @@ class MainWindow(QtWidgets.QMainWindow):
     def handle_squad_timer(self):
         self.viewer.populate_squad_viewer(self.squad)
 
+    def handle_squad_changed(self, squad: Squad):
+        """called by the squad after every change, or once per batch of changes"""
+        self.update_costs()
+        self.viewer.populate_squad_viewer(squad)
+
+    @property
+    def xwing(self) -> XWing:
+        return self.repository.xwing
+
+    @property
+    def upgrades(self) -> Upgrades:
+        return self.repository.upgrades
+
+    @property
+    def squad_codec(self) -> SquadCodec:
+        """codec for the current definition data, rebuilt after the data changed"""
+        if self.__squad_codec is None or self.__squad_codec_upgrades is not self.upgrades:
+            self.__squad_codec = SquadCodec(self.xwing, self.upgrades)
+            self.__squad_codec_upgrades = self.upgrades
+        return self.__squad_codec
+
     def initialize_definition_form(self):
-        definition_form = DefinitionForm(self.file_path)
+        # The form commits its changes through the repository, which notifies the views.
+        definition_form = DefinitionForm(self.repository)
         self.ui.action_definition_form.triggered.connect(definition_form.show)
-        definition_form.update_signal.connect(self.reload_data)
         definition_form.form_closed_signal.connect(self.handle_form_closed)
         return definition_form
 
@@ -147,14 +193,15 @@ class MainWindow(QtWidgets.QMainWindow):
         this creates an upgrade form object and assigns relevant signals/slots
         motivation for this is so we can easily reset the form when editing upgrades
         """
-        upgrade_form = UpgradeForm(self.file_path)
+        upgrade_form = UpgradeForm(self.repository)
         upgrade_form.update_signal.connect(self.handle_new_upgrade_data)
         upgrade_form.update_form_closed_signal.connect(self.handle_form_closed)
         return upgrade_form
 
     def initialize_card_viewer(self):
-        viewer = Viewer(self.xwing, self.upgrades, self.upgrade_slots_dir,
-                        self.upgrades_dir, self.factions_dir, self.ship_icons_dir, self.pilots_dir)
+        viewer = Viewer(self.repository, self.upgrade_slots_dir,
+                        self.upgrades_dir, self.factions_dir, self.ship_icons_dir, self.pilots_dir,
+                        card_loader=self.card_loader)
         self.ui.action_viewer.triggered.connect(viewer.show)
         viewer.upgrade_edit_signal.connect(self.edit_upgrade)
         viewer.pilot_edit_signal.connect(self.edit_pilot)
@@ -192,18 +239,21 @@ class MainWindow(QtWidgets.QMainWindow):
         self.definition_form.show()
 
     def reload_data(self):
-        self.definition_form.load_data()
+        """re-reads the definition file, the views are refreshed through the repository's data_changed signal"""
+        self.repository.reload()
+
+    def handle_settings_saved(self, snapshot: SettingsSnapshot = None):
+        if snapshot is not None:
+            PIXMAP_CACHE.budget = snapshot.image_cache_size * MEGABYTE
+        # Settings do not change the data, but the game mode changes which ships are visible.
+        self.refresh_data_views()
+        self.viewer.refresh()
+
+    def refresh_data_views(self):
         self.ui.ship_list_widget.clear()
         self.ui.pilot_list_widget.clear()
         self.ui.faction_list_widget.clear()
         self.ui.upgrade_list_widget.clear()
-        self.xwing = XWing.launch_xwing_data(self.file_path)
-        self.upgrades = Upgrades(self.xwing.upgrades)
-        self.viewer.upgrades = self.upgrades
-        self.viewer.xwing = self.xwing
-        self.viewer.populate_upgrade_viewer()
-        self.viewer.populate_pilot_viewer()
-        # self.viewer = self.initialize_card_viewer()
         faction_names = [prettify_name(faction)
                          for faction in self.xwing.faction_names]
         populate_list_widget(
@@ -219,12 +269,12 @@ class MainWindow(QtWidgets.QMainWindow):
 
         # If you click on a pilot...
         if treewidget_item_is_top_level(item):
-            pilot_data = self.squad.get_pilot_data(item)
+            pilot_data = self.get_squad_pilot_data(item)
             filtered_for_gui = self.upgrades.filtered_upgrades_for_gui(
                 pilot_data.filtered_upgrades)
         # If you click on an upgrade slot...
         else:
-            pilot_data = self.squad.get_pilot_data(item.parent())
+            pilot_data = self.get_squad_pilot_data(item.parent())
             upgrade_slot = get_upgrade_slot_from_list_item_text(item.text(0))
             filtered_upgrades = self.upgrades.filtered_upgrades_by_pilot_and_slot(
                 pilot_data, upgrade_slot)
@@ -247,7 +297,16 @@ class MainWindow(QtWidgets.QMainWindow):
 
     def refresh_squad_upgrade_slots(self, parent_select_item: QtWidgets.QTreeWidgetItem = None, select_item: QtWidgets.QTreeWidgetItem = None, auto_include_bypass = True):
         """rebuilds the squad list widget.  pass in args if you wish to set selection to the same prior to refresh"""
-        for item, pilot_data in self.squad.squad_dict.items():
+        # Update available upgrades based on squad, only pilots affected by a change are filtered again
+        self.upgrades.refresh_filtered_upgrades(self.squad)
+        if not auto_include_bypass:
+            # refreshes the filtered upgrades again if anything was equipped
+            for pilot_data, upgrade_name in apply_auto_includes(self.squad, self.upgrades):
+                logging.info(f"{prettify_name(upgrade_name)} equipped automatically to "
+                             f"{prettify_name(pilot_data.pilot_name)}")
+
+        for pilot_id, pilot_data in self.squad.squad_dict.items():
+            item = self.squad_items[pilot_id]
             # first clear the list
             for i in reversed(range(item.childCount())):
                 item.removeChild(item.child(i))
@@ -264,22 +323,6 @@ class MainWindow(QtWidgets.QMainWindow):
                     self.ui.squad_tree_widget.clearSelection()
                     child.setSelected(True)
 
-            # Update available upgrades based on squad
-            pilot_data.filtered_upgrades = self.upgrades.filtered_upgrades_by_pilot(
-                pilot_data, self.squad)
-
-            if not auto_include_bypass:
-                for upgrade in pilot_data.filtered_upgrades:
-                    auto_include = upgrade.get("autoinclude", "False") == "True"
-                    if auto_include:
-                        slots = self.upgrades.get_upgrade_slots(upgrade)
-                        equipped_upgrades = [upgrade.name for upgrade in pilot_data.equipped_upgrades]
-                        equipped = False
-                        if upgrade["name"] not in equipped_upgrades:
-                            equipped = pilot_data.equip_upgrade(slots, upgrade.get("name"), upgrade["cost"], upgrade)
-                        if equipped:
-                            logging.info(f"{prettify_name(upgrade['name'])} equipped automatically to {prettify_name(pilot_data.pilot_name)}")
-
             # Now color in equipped upgrades
             self.color_in_equipped_upgrades(item, pilot_data)
             self.ui.squad_tree_widget.resizeColumnToContents(0)
@@ -312,18 +355,18 @@ class MainWindow(QtWidgets.QMainWindow):
         top_level_idx = self.ui.squad_tree_widget.indexOfTopLevelItem(
             self.squad_tree_selection)
         item = self.ui.squad_tree_widget.topLevelItem(top_level_idx)
-        pilot_data = self.squad.get_pilot_data(item)
-        equipped_item = self.equip_pilot(pilot_data.faction_name, pilot_data.ship_name, pilot_data.pilot_name)
-        if equipped_item is not None:
-            new_pilot_data = self.squad.get_pilot_data(equipped_item)
+        pilot_data = self.get_squad_pilot_data(item)
+        with self.squad.batch():
+            equipped_item = self.equip_pilot(pilot_data.faction_name, pilot_data.ship_name, pilot_data.pilot_name)
+            if equipped_item is None:
+                return
+            new_pilot_data = self.get_squad_pilot_data(equipped_item)
             for upgrade in pilot_data.equipped_upgrades:
                 if upgrade.name in [u['name'] for u in new_pilot_data.filtered_upgrades]:
                     self.equip_upgrade(upgrade.name, new_pilot_data)
                 else:
                     logging.info(f"Unable to equip {prettify_name(upgrade.name)}")
-            logging.info(f"{prettify_name(pilot_data.pilot_name)} successfully copied.")
-        else:
-            return
+        logging.info(f"{prettify_name(pilot_data.pilot_name)} successfully copied.")
 
     def handle_equip_pilot(self):
         if not self.pilot_name_selected:
@@ -340,21 +383,38 @@ class MainWindow(QtWidgets.QMainWindow):
             faction_name, ship_name, pilot_name)
         ship = self.xwing.get_ship(faction_name, ship_name)
         pilot_data = PilotEquip(ship, pilot)
-        # TODO: Turn this formatting into a function as it's also used by the ship module
-        item = QtWidgets.QTreeWidgetItem([f"({pilot_data.initiative}) {prettify_name(pilot_name)} ({pilot_data.cost}) (With Upgrades: {pilot_data.cost_with_upgrades})"])
-        added = self.squad.add_pilot(item, pilot_data)
-        if not added:
-            return None
+        # adding the pilot and its automatic upgrades is one squad change
+        with self.squad.batch():
+            pilot_id = self.squad.add_pilot(pilot_data)
+            if pilot_id is None:
+                return None
+            item = self.add_squad_tree_item(pilot_id)
+            self.refresh_squad_upgrade_slots(auto_include_bypass=False)
+        # self.ui.squad_tree_widget.resizeColumnToContents(0)
+        self.ui.squad_tree_widget.expandAll()
+        return item
 
+    def add_squad_tree_item(self, pilot_id: int) -> QtWidgets.QTreeWidgetItem:
+        """
+        appends a top level item for a squad pilot.
+        its text and slots are filled in by refresh_squad_upgrade_slots.
+        """
+        item = QtWidgets.QTreeWidgetItem()
+        item.setData(0, PILOT_ID_ROLE, pilot_id)
+        self.squad_items[pilot_id] = item
         self.ui.squad_tree_widget.insertTopLevelItem(
             self.squad_tree_bottom_index, item)
-        self.refresh_squad_upgrade_slots(auto_include_bypass=False)
-        # self.ui.squad_tree_widget.resizeColumnToContents(0)
-        self.ui.squad_tree_widget.expandAll()
-        self.update_costs()
-        self.viewer.populate_squad_viewer(self.squad)
         return item
 
+    def populate_squad_tree(self):
+        """rebuilds the squad tree from the squad in a single pass"""
+        self.squad_items = {}
+        self.ui.squad_tree_widget.clear()
+        for pilot_id in self.squad.squad_dict:
+            self.add_squad_tree_item(pilot_id)
+        self.refresh_squad_upgrade_slots()
+        self.ui.squad_tree_widget.expandAll()
+
     def unequip_pilot(self):
         if self.squad_tree_selection is None:
             logging.info(
@@ -362,12 +422,12 @@ class MainWindow(QtWidgets.QMainWindow):
         top_level_idx = self.ui.squad_tree_widget.indexOfTopLevelItem(
             self.squad_tree_selection)
         item = self.ui.squad_tree_widget.topLevelItem(top_level_idx)
-        removed = self.squad.remove_pilot(item)
+        pilot_id = self.squad_pilot_id(item)
+        removed = self.squad.remove_pilot(pilot_id)
         if removed:
+            self.squad_items.pop(pilot_id, None)
             self.ui.squad_tree_widget.takeTopLevelItem(top_level_idx)
             self.refresh_squad_upgrade_slots()
-            self.update_costs()
-            self.viewer.populate_squad_viewer(self.squad)
 
     def handle_equip_upgrade(self):
         if self.squad_tree_selection is None or treewidget_item_is_top_level(self.squad_tree_selection):
@@ -375,7 +435,7 @@ class MainWindow(QtWidgets.QMainWindow):
         if self.upgrade_name_selected is None:
             logging.info("No upgrade selected - select an upgrade and try again.")
         pilot_item = self.squad_tree_selection.parent()
-        pilot_data = self.squad.get_pilot_data(pilot_item)
+        pilot_data = self.get_squad_pilot_data(pilot_item)
         self.equip_upgrade(self.upgrade_name_selected, pilot_data, self.squad_tree_selection.parent(), self.squad_tree_selection)
 
     def equip_upgrade(self, upgrade_name: str, pilot_data: PilotEquip, parent_item=None, select_item=None):
@@ -388,14 +448,12 @@ class MainWindow(QtWidgets.QMainWindow):
         if equipped:
             self.refresh_squad_upgrade_slots(parent_select_item=parent_item, select_item=select_item)
         self.handle_squad_click()
-        self.update_costs()
-        self.viewer.populate_squad_viewer(self.squad)
 
     def unequip_upgrade(self):
         if self.squad_tree_selection is None or treewidget_item_is_top_level(self.squad_tree_selection):
             return
         pilot_item = self.squad_tree_selection.parent()
-        pilot_data = self.squad.get_pilot_data(pilot_item)
+        pilot_data = self.get_squad_pilot_data(pilot_item)
         # Something is equipped
         if len(self.squad_tree_upgrade_name_selection) > 0:
             unequipped = pilot_data.unequip_upgrade(
@@ -403,8 +461,6 @@ class MainWindow(QtWidgets.QMainWindow):
             if unequipped:
                 self.refresh_squad_upgrade_slots(self.squad_tree_selection.parent(), self.squad_tree_selection)
         self.handle_squad_click()
-        self.update_costs()
-        self.viewer.populate_squad_viewer(self.squad)
 
     def update_costs(self):
         """updates the UI cost labels based on squad list"""
@@ -422,6 +478,14 @@ class MainWindow(QtWidgets.QMainWindow):
     def squad_tree_bottom_index(self):
         return self.ui.squad_tree_widget.topLevelItemCount()
 
+    @staticmethod
+    def squad_pilot_id(item: QtWidgets.QTreeWidgetItem) -> Optional[int]:
+        """returns the squad pilot id of a top level squad tree item"""
+        return item.data(0, PILOT_ID_ROLE)
+
+    def get_squad_pilot_data(self, item: QtWidgets.QTreeWidgetItem) -> Optional[PilotEquip]:
+        return self.squad.get_pilot_data(self.squad_pilot_id(item))
+
     @property
     def squad_tree_selection(self) -> QtWidgets.QTreeWidgetItem:
         try:
@@ -431,10 +495,10 @@ class MainWindow(QtWidgets.QMainWindow):
         return val
 
     def handle_new_upgrade_data(self, data):
+        # a successful insert commits through the repository, which refreshes the views
         insert_flag = self.definition_form.insert_new_upgrade_entry(data)
         if insert_flag:
             self.upgrade_form.show()
-        self.reload_data()
 
     def update_faction(self):
         if self.faction_selected is None:
@@ -454,7 +518,7 @@ class MainWindow(QtWidgets.QMainWindow):
         self.ui.upgrade_list_widget.blockSignals(False)
         self.ui.pilot_list_widget.blockSignals(True)
         self.pilot_image_label = None
-        self.ui.main_card_viewer.add_card(None)
+        self.clear_upgrade_card()
         ship_name = self.ship_selected_encoded
         ship = self.xwing.get_ship(self.faction_selected, ship_name)
         if ship is None:
@@ -489,11 +553,11 @@ class MainWindow(QtWidgets.QMainWindow):
 
     @pilot_image_label.setter
     def pilot_image_label(self, pilot_name: str):
-        self.ui.main_card_viewer.set_card(
-            image_path_to_qpixmap(self.pilots_dir / f"{pilot_name}.jpg"))
+        self.card_loader.load(PILOT_CARD, self.pilots_dir / f"{pilot_name}.jpg", self.ui.main_card_viewer.set_card,
+                              self.ui.main_card_viewer.card_resolution)
 
     def update_pilot(self):
-        self.ui.main_card_viewer.add_card(None)
+        self.clear_upgrade_card()
         self.ui.upgrade_list_widget.blockSignals(True)
         self.ui.upgrade_list_widget.clear()
         self.ui.upgrade_list_widget.blockSignals(False)
@@ -501,6 +565,10 @@ class MainWindow(QtWidgets.QMainWindow):
         if pilot_name is None or self.ship_selected_encoded is None:
             return
         self.pilot_image_label = pilot_name
+        self.card_loader.prefetch(
+            [self.pilots_dir / f"{get_pilot_name_from_list_item_text(item.text())}.jpg"
+             for item in list_widget_neighbours(self.ui.pilot_list_widget, PREFETCH_DISTANCE)],
+            self.ui.main_card_viewer.card_resolution)
         pilot = self.xwing.get_pilot(
             self.faction_selected, self.ship_selected_encoded, pilot_name)
         if pilot is None:
@@ -522,12 +590,25 @@ class MainWindow(QtWidgets.QMainWindow):
 
     def handle_update_upgrade(self):
         self.update_upgrade(self.upgrade_name_selected)
+        self.card_loader.prefetch(
+            [self.upgrades_dir / f"{get_upgrade_name_from_list_item_text(item.text())}.jpg"
+             for item in list_widget_neighbours(self.ui.upgrade_list_widget, PREFETCH_DISTANCE)],
+            self.ui.main_card_viewer.card_resolution)
 
     def update_upgrade(self, upgrade_name):
         if upgrade_name is None:
             return
-        self.ui.main_card_viewer.add_card(
-            image_path_to_qpixmap(self.upgrades_dir / f"{upgrade_name}.jpg"))
+        self.card_loader.load(UPGRADE_CARD, self.upgrades_dir / f"{upgrade_name}.jpg",
+                              self.ui.main_card_viewer.add_card, self.ui.main_card_viewer.card_resolution)
+
+    def handle_sharper_card_needed(self):
+        resolution = self.ui.main_card_viewer.card_resolution
+        self.card_loader.reload(PILOT_CARD, self.ui.main_card_viewer.replace_card, resolution)
+        self.card_loader.reload(UPGRADE_CARD, self.ui.main_card_viewer.replace_second_card, resolution)
+
+    def clear_upgrade_card(self):
+        self.card_loader.cancel(UPGRADE_CARD)
+        self.ui.main_card_viewer.add_card(None)
 
     @property
     def faction_selected(self) -> str:
@@ -687,13 +768,66 @@ class MainWindow(QtWidgets.QMainWindow):
                 self, "Save As", "", "Excel Workbook (*.xlsx)", options=options
             )
             if filename:
-                worker = Worker(self.squad.export_squad_as_excel, filename, self.squad_name)
-                self.threadpool.start(worker)
+                self.export_squads(filename, [(self.squad_name, self.squad)], 1)
         else:
             logging.info("Equip a pilot before trying to export your squad.")
 
+    def export_squad_codes(self):
+        """exports the squads of a text file of squad codes, one code per line, to one workbook"""
+        options = QtWidgets.QFileDialog.Options()
+        codes_filename, _ = QtWidgets.QFileDialog.getOpenFileName(
+            self, "Export Squad Codes", "", "Squad Codes (*.txt);;All Files (*)", options=options
+        )
+        if not codes_filename:
+            return
+        try:
+            with open(codes_filename, encoding="utf-8") as file:
+                codes = [line for line in file if line.strip()]
+        except (OSError, UnicodeDecodeError) as e:
+            logging.info(f"Unable to read squad codes: {e}")
+            return
+        if not codes:
+            logging.info("No squad codes found in the file.")
+            return
+        if len(codes) > MAX_SQUAD_SHEETS:
+            logging.info(f"A workbook holds at most {MAX_SQUAD_SHEETS} squads, the file has {len(codes)} codes.")
+            return
+        filename, _ = QtWidgets.QFileDialog.getSaveFileName(
+            self, "Save As", "", "Excel Workbook (*.xlsx)", options=options
+        )
+        if filename:
+            # squads are decoded and built one at a time while exporting
+            self.export_squads(filename, self.squad_codec.iter_squads(codes), len(codes))
+
+    def export_squads(self, filename: str, squads: Iterable[tuple], total: int):
+        """
+        writes (squad name, Squad) pairs to one workbook on the thread pool, with a cancellable progress dialog.
+        a summary sheet is added when exporting several squads
+        """
+        worker = Worker(write_squad_workbook, filename, squads, total, summary=total > 1, report_progress=True)
+        progress_dialog = QtWidgets.QProgressDialog("Exporting squads...", "Cancel", 0, total, self)
+        progress_dialog.setWindowModality(QtCore.Qt.WindowModal)
+        progress_dialog.setMinimumDuration(500)
+        progress_dialog.canceled.connect(worker.cancel)
+        worker.signals.progress.connect(lambda done, _: progress_dialog.setValue(done))
+        worker.signals.result.connect(lambda written: self.handle_squads_exported(filename, written, total))
+        worker.signals.error.connect(self.handle_export_error)
+        worker.signals.finished.connect(progress_dialog.reset)
+        start_worker(self.threadpool, worker, self.running_workers)
+
+    def handle_squads_exported(self, filename: str, written: Optional[int], total: int):
+        if written is not None:
+            squads = "squad" if written == 1 else f"{written} squads"
+            logging.info(f"Successfully exported {squads} to {filename}")
+            if written < total:
+                skipped = total - written
+                logging.info(f"Skipped {skipped} invalid squad code{'' if skipped == 1 else 's'}.")
+
+    def handle_export_error(self, error: tuple):
+        _, value, _ = error
+        logging.error(f"There was a problem exporting: {value}")
+
     def import_excel(self):
-        # TODO: Add checks for proper formatting (so you can't try to import any excel sheet)
         # TODO: This will only work for standard or epic mode
         if self.ready_for_export:
             buttonReply = QtWidgets.QMessageBox.question(
@@ -706,27 +840,71 @@ class MainWindow(QtWidgets.QMainWindow):
         )
         if not filename:
             return
-        self.squad = Squad()
-        self.ui.squad_tree_widget.clear()
+        # read the workbook off the GUI thread, large tournament workbooks can take a while
+        worker = Worker(read_squad_workbook, filename)
+        worker.signals.result.connect(self.handle_squads_imported)
+        worker.signals.error.connect(self.handle_import_error)
+        start_worker(self.threadpool, worker, self.running_workers)
+
+    def handle_squads_imported(self, specs: List[dict]):
+        """loads an imported squad, asking which one if the workbook holds several"""
+        if len(specs) == 0:
+            logging.info("No squads found in the workbook - make sure it was exported by the squad builder.")
+            return
+        spec = specs[0]
+        if len(specs) > 1:
+            labels = [f"{i + 1}. {spec.get('name')} ({prettify_name(str(spec.get('faction')))})"
+                      for i, spec in enumerate(specs)]
+            label, ok = QtWidgets.QInputDialog.getItem(
+                self, "Import Squad", f"The workbook holds {len(specs)} squads.  Select a squad to import:",
+                labels, 0, False)
+            if not ok:
+                return
+            spec = specs[labels.index(label)]
+        self.load_squad(spec)
 
-        workbook = load_workbook(filename)
-        worksheet = workbook.active
-        squad_name = worksheet['B1'].value
-        faction_name = gui_text_encode(worksheet['B2'].value)
-        self.ui.squad_name_line_edit.setText(squad_name)
-        row_idx = 5
-        while worksheet[f'A{row_idx}'].value is not None:
-            pilot_name = gui_text_encode(worksheet[f'A{row_idx}'].value)
-            ship_name = gui_text_encode(worksheet[f'B{row_idx}'].value)
-            self.equip_pilot(faction_name, ship_name, pilot_name)
-            col_idx = 5
-            while worksheet[f'{get_column_letter(col_idx)}{row_idx}'].value is not None:
-                upgrade_val = gui_text_encode(worksheet[f'{get_column_letter(col_idx)}{row_idx}'].value)
-                pilot_data = self.squad.get_pilot_data_from_name(pilot_name)
-                self.equip_upgrade(upgrade_val, pilot_data)
-                col_idx += 1
-
-            row_idx += 1
+    def handle_import_error(self, error: tuple):
+        _, value, _ = error
+        logging.error(f"There was a problem importing: {value}")
+
+    def copy_squad_code(self):
+        """copies the compact code of the squad to the clipboard"""
+        if not self.ready_for_export:
+            logging.info("Equip a pilot before trying to copy your squad.")
+            return
+        code = self.squad_codec.encode(self.squad, self.squad_name)
+        QtGui.QGuiApplication.clipboard().setText(code)
+        logging.info("Squad code copied to the clipboard.")
+
+    def paste_squad_code(self):
+        """replaces the squad with the squad of a code on the clipboard"""
+        try:
+            spec = self.squad_codec.decode_spec(QtGui.QGuiApplication.clipboard().text())
+        except ValueError as e:
+            logging.info(f"Unable to paste squad: {e}")
+            return
+        if self.ready_for_export:
+            buttonReply = QtWidgets.QMessageBox.question(
+                self, "Warning", "Squad already in progress.  Are you sure you want to paste?",
+                QtWidgets.QMessageBox.Yes | QtWidgets.QMessageBox.Cancel)
+            if buttonReply == QtWidgets.QMessageBox.Cancel:
+                return
+        self.load_squad(spec)
+
+    def load_squad(self, spec: dict):
+        """replaces the squad with a squad specification, applied as one batch and shown in a single refresh"""
+        self.squad.remove_change_callback(self.handle_squad_changed)
+        self.squad = Squad()
+        self.squad.add_change_callback(self.handle_squad_changed)
+        self.ui.squad_name_line_edit.setText(spec.get("name") or "")
+        _, errors = build_squad(spec, self.xwing, self.upgrades, self.squad)
+        for error in errors:
+            logging.info(error)
+        if not self.squad.squad_dict:
+            # an empty batch does not notify
+            self.update_costs()
+        self.populate_squad_tree()
+        faction_name = spec.get("faction")
         for i in range(self.ui.faction_list_widget.count()):
             item = self.ui.faction_list_widget.item(i)
             if gui_text_encode(item.text()) == faction_name:
@@ -0,0 +1,85 @@
+"""
+On-disk cache of the compiled definition data.
+
+Parsing the full definition.json is the most expensive part of loading the data.  The cache stores
+the fully built (and indexed) catalog object with pickle, keyed by a hash of the definition file
+contents, so a later load only needs to hash the file and unpickle.  The cache is rebuilt from the
+JSON source whenever the hash, the cache format or the application version changes.
+"""
+import hashlib
+import json
+import logging
+import pickle
+from pathlib import Path
+
+from typing import Callable, Optional, TypeVar, Union
+
+from ..utils import atomic_write_path
+from ..version import __version__
+
+# Bump this whenever the layout of the cached objects changes.
+CACHE_VERSION = 1
+CACHE_SUFFIX = ".cache"
+
+T = TypeVar("T")
+
+
+def default_cache_path(data_path: Union[str, Path]) -> Path:
+    """returns the cache file path used for a definition file, e.g. definition.json -> definition.cache"""
+    return Path(data_path).with_suffix(CACHE_SUFFIX)
+
+
+def content_hash(raw: bytes) -> str:
+    return hashlib.sha256(raw).hexdigest()
+
+
+def cache_key(raw: bytes) -> tuple:
+    return (CACHE_VERSION, __version__, content_hash(raw))
+
+
+def read_cache(cache_path: Path, key: tuple):
+    """returns the cached object if the cache file exists and matches the key, otherwise None"""
+    try:
+        with open(cache_path, "rb") as file:
+            cached_key, obj = pickle.load(file)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logging.debug(f"Ignoring unreadable catalog cache {cache_path}: {e}")
+        return None
+    if cached_key != key:
+        return None
+    return obj
+
+
+def write_cache(cache_path: Path, key: tuple, obj) -> bool:
+    """writes the cache atomically, returns True if written"""
+    try:
+        with atomic_write_path(cache_path) as tmp_path, open(tmp_path, "wb") as file:
+            pickle.dump((key, obj), file, protocol=pickle.HIGHEST_PROTOCOL)
+    except OSError as e:
+        logging.warning(f"Unable to write catalog cache {cache_path}: {e}")
+        return False
+    return True
+
+
+def load_catalog(data_path: Union[str, Path], build: Callable[[dict], T], cache_path: Optional[Path] = None) -> T:
+    """
+    Loads the definition file at data_path and returns build(data).
+
+    The built object is taken from the cache when the definition file has not changed, otherwise
+    it is rebuilt from the JSON source and the cache is refreshed.
+    """
+    data_path = Path(data_path)
+    if cache_path is None:
+        cache_path = default_cache_path(data_path)
+    with open(data_path, "rb") as file:
+        raw = file.read()
+    key = cache_key(raw)
+    obj = read_cache(cache_path, key)
+    if obj is not None:
+        return obj
+    logging.debug(f"Rebuilding catalog cache for {data_path}")
+    obj = build(json.loads(raw))
+    write_cache(cache_path, key, obj)
+    return obj
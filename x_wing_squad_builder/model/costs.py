@@ -0,0 +1,41 @@
+"""
+Compiles upgrade costs into direct lookups.
+
+Variable costs are stored in the definition as {'attribute': <attribute>, '<value>': <cost>, ...} with the
+attribute value stringified.  compile_cost turns them once into a table keyed by the value itself, and
+every PilotEquip resolves its cost attributes once when it is created, so resolving a cost is a single
+dictionary lookup.
+"""
+from collections import namedtuple
+
+from typing import Union
+
+CostTable = namedtuple('CostTable', ['attribute', 'costs'])
+
+COST_ATTRIBUTES = ["base", "initiative", "agility"]
+# any other attribute is resolved with the pilot's highest attack value
+ATTACK_ATTRIBUTE = "attacks"
+
+
+def cost_attribute(attribute: str) -> str:
+    return attribute if attribute in COST_ATTRIBUTES else ATTACK_ATTRIBUTE
+
+
+def compile_cost(cost: Union[int, dict]) -> Union[int, CostTable]:
+    """returns fixed costs unchanged and variable costs as a CostTable"""
+    if type(cost) is int:
+        return cost
+    costs = {}
+    for key, value in cost.items():
+        if key == "attribute":
+            continue
+        # numeric attribute values are stored as strings in the definition
+        costs[int(key) if key.lstrip("-").isdigit() else key] = value
+    return CostTable(cost_attribute(cost.get("attribute")), costs)
+
+
+def resolve_cost(compiled_cost: Union[int, CostTable], pilot) -> int:
+    """returns the cost for the pilot, see PilotEquip.cost_attributes"""
+    if type(compiled_cost) is int:
+        return compiled_cost
+    return compiled_cost.costs.get(pilot.cost_attributes[compiled_cost.attribute])
@@ -0,0 +1,66 @@
+"""
+Tracks which squad members' filtered upgrade lists depend on which names.
+
+A pilot's filtered upgrades only change when the pilot itself changes or when a name it depends on is
+added to or removed from the squad: the names and uniqueness roots of its unique and solitary candidate
+upgrades, and the names listed in the squad includes of its candidates.  The tracker records those
+dependencies whenever a pilot is filtered and marks the pilots depending on a changed name as dirty, so
+only those have to be filtered again.
+"""
+from .unique_upgrades import get_root
+
+from typing import Iterable, List
+
+
+class DependencyTracker:
+    """
+    Dirty set of squad members keyed on their PilotEquip objects.
+    """
+
+    def __init__(self):
+        self.__names = {}
+        self.__roots = {}
+        self.__dirty = set()
+        # what the recorded dependencies were computed against, see Upgrades.refresh_filtered_upgrades
+        self.context = None
+
+    @property
+    def dirty(self) -> set:
+        return self.__dirty
+
+    def record(self, pilot, names: Iterable[str], roots: Iterable[str]):
+        """records the names and roots the freshly filtered upgrades of a pilot depend on"""
+        self.__names[pilot] = frozenset(names)
+        self.__roots[pilot] = frozenset(roots)
+        self.__dirty.discard(pilot)
+
+    def add(self, pilot):
+        self.__names[pilot] = frozenset()
+        self.__roots[pilot] = frozenset()
+        self.__dirty.add(pilot)
+
+    def remove(self, pilot):
+        self.__names.pop(pilot, None)
+        self.__roots.pop(pilot, None)
+        self.__dirty.discard(pilot)
+
+    def mark_dirty(self, pilot):
+        if pilot in self.__names:
+            self.__dirty.add(pilot)
+
+    def mark_all_dirty(self):
+        self.__dirty.update(self.__names)
+
+    def invalidate(self, changed_names: Iterable[str]):
+        """marks every pilot depending on one of the names (or their roots) that entered or left the squad"""
+        changed_names = set(changed_names)
+        changed_roots = {get_root(name) for name in changed_names}
+        for pilot, names in self.__names.items():
+            if not names.isdisjoint(changed_names) or not self.__roots[pilot].isdisjoint(changed_roots):
+                self.__dirty.add(pilot)
+
+    def pop_dirty(self) -> List:
+        """returns the dirty pilots and clears the dirty set"""
+        dirty = list(self.__dirty)
+        self.__dirty.clear()
+        return dirty
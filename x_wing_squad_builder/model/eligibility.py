@@ -0,0 +1,199 @@
+"""
+Vectorized pilot x upgrade eligibility.
+
+EligibilityMatrix encodes the static attributes of every pilot and the restrictions of every upgrade as
+NumPy arrays and computes which upgrades each pilot may equip in a handful of array operations.  It
+answers "what can this pilot equip" for the whole catalog at once, for the viewer, analytics or bulk
+validation.
+
+The result matches Upgrades.filtered_upgrades_by_pilot for a pilot without equipped upgrades in an
+empty squad: uniqueness and squad includes are squad dependent and are not part of the matrix, and
+upgrades requiring other equipped upgrades are never eligible for a bare pilot.
+"""
+from collections import Counter
+
+import numpy as np
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .pilot_equip import PilotEquip
+from .upgrade_filters import bool_string_filter
+from .xwing import XWing
+from .settings_snapshot import Mode
+
+PilotKey = Tuple[str, str, str]
+
+RANGE_MIN = np.iinfo(np.int32).min
+RANGE_MAX = np.iinfo(np.int32).max
+
+
+def membership(pilot_values: List[Iterable], upgrade_values: List[Iterable]) -> np.ndarray:
+    """
+    returns a (pilots, upgrades) boolean array, True where a pilot has at least one of the values accepted
+    by the upgrade or where the upgrade accepts any value (empty list).
+    """
+    vocabulary = {}
+    for values in list(pilot_values) + list(upgrade_values):
+        for value in values:
+            vocabulary.setdefault(value, len(vocabulary))
+    pilot_hot = np.zeros((len(pilot_values), max(len(vocabulary), 1)), dtype=np.int32)
+    upgrade_hot = np.zeros((len(upgrade_values), max(len(vocabulary), 1)), dtype=np.int32)
+    for i, values in enumerate(pilot_values):
+        pilot_hot[i, [vocabulary[value] for value in values]] = 1
+    for j, values in enumerate(upgrade_values):
+        upgrade_hot[j, [vocabulary[value] for value in values]] = 1
+    overlap = (pilot_hot @ upgrade_hot.T) > 0
+    unrestricted = upgrade_hot.sum(axis=1) == 0
+    return overlap | unrestricted[np.newaxis, :]
+
+
+def in_ranges(pilot_values: np.ndarray, low: np.ndarray, high: np.ndarray) -> np.ndarray:
+    """returns a (pilots, upgrades) boolean array, True where low <= value < high"""
+    values = pilot_values[:, np.newaxis]
+    return (values >= low[np.newaxis, :]) & (values < high[np.newaxis, :])
+
+
+def range_bounds(ranges: List[Optional[dict]]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    converts {'low': <low>, 'high': <high>} restrictions to bound arrays.  a range with a single null bound
+    uses the 0 / 100 defaults of statistics_filter_simple, a fully null range does not restrict anything.
+    """
+    low = np.full(len(ranges), RANGE_MIN, dtype=np.int64)
+    high = np.full(len(ranges), RANGE_MAX, dtype=np.int64)
+    for j, value in enumerate(ranges):
+        if not value or (value.get("low") is None and value.get("high") is None):
+            continue
+        low[j] = value["low"] if value.get("low") is not None else 0
+        high[j] = value["high"] if value.get("high") is not None else 100
+    return low, high
+
+
+def action_key(action: dict) -> tuple:
+    return tuple(sorted(action.items()))
+
+
+class EligibilityMatrix:
+    """
+    Boolean (pilots x upgrades) matrix of static upgrade eligibility.
+
+    pilots is a list of (pilot key, PilotEquip) pairs without equipped upgrades and upgrades the list
+    of upgrade dictionaries.
+    """
+
+    def __init__(self, pilots: List[Tuple[PilotKey, PilotEquip]], upgrades: List[dict], mode: Mode):
+        self.__pilot_keys = [key for key, _ in pilots]
+        self.__pilot_positions = {key: i for i, key in enumerate(self.__pilot_keys)}
+        self.__upgrade_names = [upgrade["name"] for upgrade in upgrades]
+        self.__upgrade_positions = {name: j for j, name in enumerate(self.__upgrade_names)}
+        self.mode = mode
+        self.__matrix = self.__compute([pilot for _, pilot in pilots], upgrades)
+
+    @classmethod
+    def from_catalog(cls, xwing: XWing, upgrades: List[dict], mode: Mode) -> "EligibilityMatrix":
+        """builds the matrix for every pilot in the catalog"""
+        ships = {}
+        for faction_name in xwing.faction_names:
+            for ship in xwing.get_faction(faction_name).all_ships:
+                ships[(faction_name, ship.ship_name)] = ship
+        pilots = []
+        for key in xwing.pilot_keys:
+            ship = ships[key[:2]]
+            pilots.append((key, PilotEquip(ship, ship.get_pilot_data(key[2]))))
+        return cls(pilots, upgrades, mode)
+
+    @property
+    def matrix(self) -> np.ndarray:
+        return self.__matrix
+
+    @property
+    def pilot_keys(self) -> List[PilotKey]:
+        return self.__pilot_keys
+
+    @property
+    def upgrade_names(self) -> List[str]:
+        return self.__upgrade_names
+
+    def eligible_upgrade_names(self, pilot_key: PilotKey) -> List[str]:
+        row = self.__matrix[self.__pilot_positions[pilot_key]]
+        return [self.__upgrade_names[j] for j in np.flatnonzero(row)]
+
+    def eligible_pilot_keys(self, upgrade_name: str) -> List[PilotKey]:
+        column = self.__matrix[:, self.__upgrade_positions[upgrade_name]]
+        return [self.__pilot_keys[i] for i in np.flatnonzero(column)]
+
+    def eligible_counts(self) -> Dict[PilotKey, int]:
+        """returns the number of eligible upgrades per pilot"""
+        return dict(zip(self.__pilot_keys, self.__matrix.sum(axis=1).tolist()))
+
+    def eligible_pilot_counts(self) -> Dict[str, int]:
+        """returns the number of eligible pilots per upgrade"""
+        return dict(zip(self.__upgrade_names, self.__matrix.sum(axis=0).tolist()))
+
+    def __pilot_slots(self, pilot: PilotEquip) -> List[str]:
+        """the upgrade slots of a pilot without equipped upgrades in the matrix mode"""
+        slots = pilot.default_upgrade_slots + pilot.hardpoint
+        if self.mode == Mode.EPIC and pilot.base_size != "huge":
+            slots.append("command")
+        return slots
+
+    def __compute(self, pilots: List[PilotEquip], upgrades: List[dict]) -> np.ndarray:
+        restrictions = [upgrade.get("restrictions") or {} for upgrade in upgrades]
+        eligible = np.ones((len(pilots), len(upgrades)), dtype=bool)
+
+        # upgrade slots: the pilot needs at least as many of each slot as the upgrade consumes
+        slot_counts = [Counter(self.__pilot_slots(pilot)) for pilot in pilots]
+        upgrade_slot_counts = [Counter(upgrade.get("upgrade_slot_types") or []) for upgrade in upgrades]
+        slot_names = sorted({slot for counts in slot_counts + upgrade_slot_counts for slot in counts})
+        pilot_slots = np.array([[counts[slot] for slot in slot_names] for counts in slot_counts], dtype=np.int32)
+        upgrade_slots = np.array([[counts[slot] for slot in slot_names] for counts in upgrade_slot_counts],
+                                 dtype=np.int32)
+        pilot_slots = pilot_slots.reshape(len(pilots), len(slot_names))
+        upgrade_slots = upgrade_slots.reshape(len(upgrades), len(slot_names))
+        eligible &= (upgrade_slots[np.newaxis, :, :] <= pilot_slots[:, np.newaxis, :]).all(axis=2)
+
+        if self.mode != Mode.EPIC:
+            epic = np.array([bool_string_filter(upgrade.get("epic", "False")) for upgrade in upgrades], dtype=bool)
+            eligible &= ~epic[np.newaxis, :]
+
+        # name restrictions
+        eligible &= membership([[pilot.faction_name] for pilot in pilots],
+                               [r.get("factions") or [] for r in restrictions])
+        eligible &= membership([[pilot.ship_name] for pilot in pilots],
+                               [r.get("ships") or [] for r in restrictions])
+        eligible &= membership([[pilot.base_size] for pilot in pilots],
+                               [r.get("base_sizes") or [] for r in restrictions])
+        eligible &= membership([pilot.arc_types for pilot in pilots],
+                               [r.get("arc_types") or [] for r in restrictions])
+        eligible &= membership([pilot.keywords for pilot in pilots],
+                               [r.get("keywords") or [] for r in restrictions])
+        eligible &= membership([[action_key(action) for action in pilot.actions] for pilot in pilots],
+                               [[action_key(action) for action in r.get("actions") or []] for r in restrictions])
+
+        # range restrictions
+        def statistic(pilot: PilotEquip, key: str, sub_key: Optional[str] = None) -> int:
+            value = pilot.get_statistic(pilot.statistics, key)[key]
+            if sub_key is not None:
+                value = value.get(sub_key)
+            return 0 if value is None else value
+
+        simple_ranges = [
+            ("pilot_initiative", [pilot.initiative or 0 for pilot in pilots]),
+            ("attacks", [pilot.max_attack or 0 for pilot in pilots]),
+            ("agility", [statistic(pilot, "agility") for pilot in pilots]),
+            ("hull", [statistic(pilot, "hull") for pilot in pilots]),
+        ]
+        for key, values in simple_ranges:
+            low, high = range_bounds([r.get(key) for r in restrictions])
+            eligible &= in_ranges(np.array(values, dtype=np.int64), low, high)
+
+        for key in ["shield", "force", "energy", "charge"]:
+            for sub_key in [key, "recharge", "decharge"]:
+                values = np.array([statistic(pilot, key, sub_key) for pilot in pilots], dtype=np.int64)
+                low, high = range_bounds([(r.get(key) or {}).get(sub_key) for r in restrictions])
+                eligible &= in_ranges(values, low, high)
+
+        # other equipped upgrades can never be satisfied by a pilot without upgrades
+        requires_upgrades = np.array([bool(r.get("other_equipped_upgrades")) for r in restrictions], dtype=bool)
+        eligible &= ~requires_upgrades[np.newaxis, :]
+
+        return eligible
@@ -1,16 +1,19 @@
-from typing import List, Tuple, Optional
+from typing import List, Tuple, Optional, Dict
 from .ship import Ship
 
-from ..settings import Settings
+from .settings_snapshot import Mode, SETTINGS
 
 from ..utils import prettify_name
 
 
 class Faction:
-    settings = Settings()
+    settings = SETTINGS
 
     def __init__(self, data: dict):
         self.faction_data = data
+        # Ships are built once per load and shared by every lookup.
+        self.__ships = [Ship(self.faction_name, ship) for ship in self.faction_data['ships']]
+        self.__ships_by_name: Dict[str, Ship] = {ship.ship_name: ship for ship in self.__ships}
 
     def __repr__(self):
         return f"Faction(name={self.faction_name})"
@@ -19,23 +22,24 @@ class Faction:
     def faction_name(self) -> str:
         return self.faction_data['name']
 
+    @property
+    def all_ships(self) -> List[Ship]:
+        """returns every ship of the faction, regardless of the game mode."""
+        return self.__ships
+
     @property
     def faction_ships(self) -> List[Ship]:
-        ships = []
-        for ship in self.faction_data['ships']:
-            new_ship = Ship(self.faction_name, ship)
-            if self.settings.mode != Settings.Mode.EPIC:
-                if new_ship.base == "huge":
-                    continue
-            ships.append(new_ship)
-        return ships
+        epic = self.settings.mode == Mode.EPIC
+        return [ship for ship in self.__ships if epic or ship.base != "huge"]
 
     @property
     def ship_names_for_gui(self):
         return sorted([prettify_name(ship.ship_name) for ship in self.faction_ships])
 
     def get_ship(self, ship_name: str) -> Optional[Ship]:
-        for ship in self.faction_ships:
-            if ship_name == ship.ship_name:
-                return ship
-        return None
+        ship = self.__ships_by_name.get(ship_name)
+        if ship is None:
+            return None
+        if ship.base == "huge" and self.settings.mode != Mode.EPIC:
+            return None
+        return ship
@@ -3,11 +3,12 @@ from collections import namedtuple
 
 from .ship import Ship
 from .upgrade_filters import upgrade_slot_filter
+from .costs import cost_attribute
 
-from ..settings import Settings
+from .settings_snapshot import Mode, SETTINGS
 from ..utils import prettify_name
 
-from typing import List, Dict
+from typing import Callable, List, Dict
 
 
 Upgrade = namedtuple('Upgrade', ['slots', 'name', 'cost', 'attributes'])
@@ -18,16 +19,25 @@ class PilotEquip:
     This class is used for managing equipped pilot data.
 
     Note that filtered upgrades are intended to be updated from the Upgrades class.
+
+    Values derived from the equipped upgrades are memoized until the next equip or unequip.
     """
-    settings = Settings()
+    __slots__ = ("ship", "pilot", "data", "__filtered_upgrades", "__filtered_upgrades_by_slot",
+                 "__equipped_upgrades", "__change_callbacks", "__cost_attributes", "__derived")
+
+    settings = SETTINGS
 
     def __init__(self, ship: Ship, pilot: dict):
         self.ship = ship
         self.pilot = pilot
         self.__filtered_upgrades = []
+        self.__filtered_upgrades_by_slot = {}
         self.__equipped_upgrades = []
+        self.__change_callbacks = []
+        self.__derived = {}
 
         self.data = self.__synthesize_ship_and_pilot()
+        self.__cost_attributes = self.__resolve_cost_attributes()
 
     def __synthesize_ship_and_pilot(self):
         d = {}
@@ -56,6 +66,37 @@ class PilotEquip:
     @filtered_upgrades.setter
     def filtered_upgrades(self, val: List[Dict]):
         self.__filtered_upgrades = val
+        by_slot = {}
+        for upgrade in val:
+            for slot in dict.fromkeys(upgrade.get("upgrade_slot_types", [])):
+                by_slot.setdefault(slot, []).append(upgrade)
+        self.__filtered_upgrades_by_slot = by_slot
+
+    @property
+    def filtered_upgrades_by_slot(self) -> Dict[str, List[Dict]]:
+        """
+        the filtered upgrades partitioned by the upgrade slots they consume, in filtered order.
+        """
+        return self.__filtered_upgrades_by_slot
+
+    def add_change_callback(self, callback: Callable[["PilotEquip", str], None]):
+        """registers a callback called with (pilot, upgrade name) whenever an upgrade is equipped or unequipped"""
+        self.__change_callbacks.append(callback)
+
+    def remove_change_callback(self, callback: Callable[["PilotEquip", str], None]):
+        if callback in self.__change_callbacks:
+            self.__change_callbacks.remove(callback)
+
+    def __memoized(self, key, compute: Callable):
+        """returns the cached value for key, computing it on first access since the last change"""
+        if key not in self.__derived:
+            self.__derived[key] = compute()
+        return self.__derived[key]
+
+    def __notify_change(self, upgrade_name: str):
+        self.__derived.clear()
+        for callback in self.__change_callbacks:
+            callback(self, upgrade_name)
 
     @property
     def base_size(self):
@@ -129,6 +170,9 @@ class PilotEquip:
             ...
         ]
         """
+        return self.__memoized("actions", self.__compute_actions)
+
+    def __compute_actions(self) -> List[dict]:
         additional_actions = []
         for upgrade in self.equipped_upgrades:
             additional_actions.extend(upgrade.attributes.get("modifications", {}).get("actions", []))
@@ -141,7 +185,7 @@ class PilotEquip:
 
     @property
     def arc_types(self) -> list:
-        return [attack.get("arc_type") for attack in self.attacks]
+        return self.__memoized("arc_types", lambda: [attack.get("arc_type") for attack in self.attacks])
 
     @property
     def attacks(self):
@@ -150,7 +194,7 @@ class PilotEquip:
 
     @property
     def max_attack(self):
-        return max([attack.get("attack") for attack in self.attacks])
+        return self.__memoized("max_attack", lambda: max([attack.get("attack") for attack in self.attacks]))
 
     @staticmethod
     def get_statistic(statistics_list, statistic_name):
@@ -164,13 +208,24 @@ class PilotEquip:
         """
         This function is used to assess attributes that impact variable cost.
         """
-        if (attribute == "base") or (attribute == "initiative"):
-            return self.data.get(attribute)
-        elif attribute == "agility":
-            statistic = self.get_statistic(self.statistics, attribute)
-            return statistic.get(attribute)
-        else:
-            return self.max_attack
+        return self.cost_attributes[cost_attribute(attribute)]
+
+    @property
+    def cost_attributes(self) -> Dict[str, object]:
+        """
+        the attributes variable upgrade costs depend on, resolved once when the pilot is created.
+        """
+        return self.__cost_attributes
+
+    def __resolve_cost_attributes(self) -> Dict[str, object]:
+        agility = self.get_statistic(self.statistics, "agility") or {}
+        attacks = [attack.get("attack") for attack in self.attacks or []]
+        return {
+            "base": self.data.get("base"),
+            "initiative": self.data.get("initiative"),
+            "agility": agility.get("agility"),
+            "attacks": max(attacks) if attacks else None,
+        }
 
     def __combine_statistics(self):
         ship_statistics = self.ship.statistics.copy()
@@ -226,8 +281,12 @@ class PilotEquip:
         returns upgrade slots, adds additional slots based on equipped upgrades and weapon hardpoints
         adds a command slot if the mode is epic
         """
+        mode = self.settings.mode
+        return self.__memoized(("upgrade_slots", mode), lambda: self.__compute_upgrade_slots(mode))
+
+    def __compute_upgrade_slots(self, mode: Mode) -> List[str]:
         additional_slots = []
-        if self.settings.mode == Settings.Mode.EPIC and self.base_size != "huge":
+        if mode == Mode.EPIC and self.base_size != "huge":
             additional_slots.append("command")
         added = []
         removed = []
@@ -251,8 +310,7 @@ class PilotEquip:
 
     @property
     def cost_with_upgrades(self):
-        upgrade_cost = sum([upgrade.cost for upgrade in self.equipped_upgrades])
-        return self.data.get("cost") + upgrade_cost
+        return self.__memoized("cost_with_upgrades", lambda: self.data.get("cost") + self.total_equipped_upgrade_cost)
 
     @property
     def equipped_upgrades(self) -> List[Upgrade]:
@@ -265,6 +323,10 @@ class PilotEquip:
     @property
     def available_upgrade_slots(self) -> List[str]:
         """Returns all remaining upgrade slots available for an equipped pilot."""
+        mode = self.settings.mode
+        return self.__memoized(("available_upgrade_slots", mode), self.__compute_available_upgrade_slots)
+
+    def __compute_available_upgrade_slots(self) -> List[str]:
         upgrade_slots = self.upgrade_slots.copy()
         for upgrade in self.equipped_upgrades:
             for slot in upgrade.slots:
@@ -290,6 +352,7 @@ class PilotEquip:
                 logging.info("Unable to equip more than one of an upgrade to the same pilot instance.")
                 return False
         self.__equipped_upgrades.append(Upgrade(upgrade_slots, upgrade_name, upgrade_cost, upgrade_dict))
+        self.__notify_change(upgrade_name)
         return True
 
     def unequip_upgrade(self, upgrade_name):
@@ -307,4 +370,6 @@ class PilotEquip:
                 self.__equipped_upgrades.pop(self.__equipped_upgrades.index(upgrade))
                 unequipped = True
                 break
+        if unequipped:
+            self.__notify_change(upgrade_name)
         return unequipped
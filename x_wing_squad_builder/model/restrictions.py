@@ -0,0 +1,175 @@
+"""
+Compiles the restrictions of an upgrade into the short list of checks that actually constrain it.
+
+Every upgrade in the definition carries the full restriction template, and most of its entries are
+empty lists or null ranges.  compile_restrictions drops those no-op entries once when the upgrades
+are loaded, so filtering a pilot only evaluates the restrictions that matter.
+
+Restrictions that only look at the pilot's own printed attributes are static, their result never changes
+for a given pilot.  Restrictions that look at equipped upgrades or at the rest of the squad are flagged
+dynamic and have to be re-evaluated whenever the squad changes.
+"""
+from collections import namedtuple
+
+from typing import Callable, List, Optional
+
+from .upgrade_filters import actions_filter, name_filter
+
+# check is called as check(pilot, squad) and returns True if the pilot passes the restriction
+Restriction = namedtuple('Restriction', ['key', 'check', 'dynamic'], defaults=[False])
+
+# restrictions depending on equipped upgrades or on the squad
+DYNAMIC_RESTRICTIONS = ["limit", "actions", "other_equipped_upgrades"]
+
+SIMPLE_STATISTICS = ["agility", "hull"]
+ADVANCED_STATISTICS = ["shield", "force", "energy", "charge"]
+
+
+def is_unrestricted_range(value: Optional[dict]) -> bool:
+    """returns True if a {'low': <low>, 'high': <high>} range does not restrict anything"""
+    return not value or (value.get("low") is None and value.get("high") is None)
+
+
+def range_check(value: dict) -> Callable[[Optional[int]], bool]:
+    """
+    returns a function testing a statistic value against a {'low': <low>, 'high': <high>} range.
+    the range semantics match statistics_filter_simple: null bounds default to 0 and 100,
+    the high bound is exclusive and a null statistic counts as 0.
+    """
+    low = value.get("low")
+    high = value.get("high")
+    if low is None:
+        low = 0
+    if high is None:
+        high = 100
+
+    def _check(test_val: Optional[int]) -> bool:
+        if test_val is None:
+            test_val = 0
+        return low <= test_val < high
+    return _check
+
+
+def compile_limit(upgrade_name: str, limit: int) -> Optional[Callable]:
+    if not limit:
+        return None
+
+    def _check(pilot, squad) -> bool:
+        count = sum(1 for upgrade in pilot.equipped_upgrades if upgrade.name == upgrade_name)
+        return count < limit
+    return _check
+
+
+def compile_pilot_initiative(value: dict) -> Optional[Callable]:
+    if is_unrestricted_range(value):
+        return None
+    in_range = range_check(value)
+    return lambda pilot, squad: in_range(pilot.initiative)
+
+
+def compile_factions(value: list, squad_include: list) -> Optional[Callable]:
+    if not value:
+        return None
+    factions = frozenset(value)
+    if not squad_include:
+        return lambda pilot, squad: pilot.faction_name in factions
+
+    def _check(pilot, squad) -> bool:
+        # upgrades with a squad include may be used out of faction if one of the included names is in the squad
+        if pilot.faction_name in factions:
+            return True
+        return any(squad.has_name(name) for name in squad_include)
+    return _check
+
+
+def compile_name(value: list, attribute: str) -> Optional[Callable]:
+    if not value:
+        return None
+    names = frozenset(value)
+    return lambda pilot, squad: getattr(pilot, attribute) in names
+
+
+def compile_multiple_names(value: list, attribute: str) -> Optional[Callable]:
+    if not value:
+        return None
+    names = frozenset(value)
+    return lambda pilot, squad: any(name in names for name in getattr(pilot, attribute))
+
+
+def compile_attacks(value: dict) -> Optional[Callable]:
+    # NOTE: we decoupled attacks and arc_types in the filtering.  This may need to be changed in the future.
+    if is_unrestricted_range(value):
+        return None
+    in_range = range_check(value)
+    return lambda pilot, squad: in_range(pilot.max_attack)
+
+
+def compile_simple_statistic(key: str, value: dict) -> Optional[Callable]:
+    if is_unrestricted_range(value):
+        return None
+    in_range = range_check(value)
+    return lambda pilot, squad: in_range(pilot.get_statistic(pilot.statistics, key).get(key))
+
+
+def compile_advanced_statistic(key: str, value: dict) -> Optional[Callable]:
+    """value is of the form {'<key>': <range>, 'recharge': <range>, 'decharge': <range>}"""
+    checks = [(sub_key, range_check(sub_value)) for sub_key, sub_value in value.items()
+              if not is_unrestricted_range(sub_value)]
+    if not checks:
+        return None
+
+    def _check(pilot, squad) -> bool:
+        test_statistic = pilot.get_statistic(pilot.statistics, key)[key]
+        return all(in_range(test_statistic.get(sub_key)) for sub_key, in_range in checks)
+    return _check
+
+
+def compile_actions(value: list) -> Optional[Callable]:
+    if not value:
+        return None
+    return lambda pilot, squad: actions_filter(value, pilot.actions)
+
+
+def compile_other_equipped_upgrades(value: list) -> Optional[Callable]:
+    if not value:
+        return None
+    return lambda pilot, squad: name_filter(value, pilot.equipped_upgrades)
+
+
+def compile_restrictions(upgrade: dict) -> List[Restriction]:
+    """returns the active restrictions of an upgrade, restrictions that cannot fail are left out."""
+    restrictions = upgrade.get("restrictions") or {}
+    compiled = []
+    for key, value in restrictions.items():
+        check = None
+        if key == "limit":
+            check = compile_limit(upgrade["name"], value)
+        elif key == "pilot_limit":
+            # TODO: pilot limits are not evaluated yet
+            pass
+        elif key == "pilot_initiative":
+            check = compile_pilot_initiative(value)
+        elif key == "factions":
+            check = compile_factions(value, upgrade.get("squad_include", []))
+        elif key == "ships":
+            check = compile_name(value, "ship_name")
+        elif key == "base_sizes":
+            check = compile_name(value, "base_size")
+        elif key == "attacks":
+            check = compile_attacks(value)
+        elif key == "arc_types":
+            check = compile_multiple_names(value, "arc_types")
+        elif key in SIMPLE_STATISTICS:
+            check = compile_simple_statistic(key, value)
+        elif key in ADVANCED_STATISTICS:
+            check = compile_advanced_statistic(key, value)
+        elif key == "actions":
+            check = compile_actions(value)
+        elif key == "keywords":
+            check = compile_multiple_names(value, "keywords")
+        elif key == "other_equipped_upgrades":
+            check = compile_other_equipped_upgrades(value)
+        if check is not None:
+            dynamic = key in DYNAMIC_RESTRICTIONS or (key == "factions" and bool(upgrade.get("squad_include")))
+            compiled.append(Restriction(key, check, dynamic))
+    return compiled
@@ -0,0 +1,37 @@
+"""
+Game settings as plain Python objects.
+
+The model reads the game mode from the shared SETTINGS snapshot, so rules checks never touch QSettings or
+import Qt.  The GUI keeps the snapshot in sync with the persisted settings, see Settings.snapshot.
+"""
+from enum import Enum
+
+
+class Mode(Enum):
+    STANDARD = "Standard"
+    EPIC = "Epic"
+    FREEDOM = "Freedom"
+
+
+class SettingsSnapshot:
+    """
+    Plain attribute copy of the settings.  Hot paths read the shared snapshot instead of querying the
+    settings backend.
+    """
+
+    def __init__(self, mode: Mode = Mode.STANDARD, scale: float = 1, **values):
+        self.mode = mode
+        self.scale = scale
+        self.update(**values)
+
+    def update(self, **values):
+        for key, value in values.items():
+            setattr(self, key, value)
+
+    def refresh(self, settings):
+        """copies every key of a Settings object"""
+        for key in settings.Key:
+            setattr(self, key.value, getattr(settings, key.value))
+
+
+SETTINGS = SettingsSnapshot()
@@ -6,6 +6,7 @@ class Ship:
     def __init__(self, faction_name: str, ship_data: dict):
         self.__faction_name = faction_name
         self.__ship_data = ship_data
+        self.__pilots_by_name = {pilot["name"]: pilot for pilot in self.pilots}
 
     def __repr__(self):
         return f"Ship(ship_name = {self.ship_name}, faction_name = {self.faction_name})"
@@ -91,10 +92,7 @@ class Ship:
                 return stat[attribute]
 
     def get_pilot_data(self, pilot_name: str) -> Optional[dict]:
-        for pilot in self.pilots:
-            if pilot["name"] == pilot_name:
-                return pilot
-        return None
+        return self.__pilots_by_name.get(pilot_name)
 
     def get_pilot_actions(self, pilot_name: str):
         pilot = self.get_pilot_data(pilot_name)
@@ -1,77 +1,177 @@
 from .pilot_equip import PilotEquip
+from .dependency_tracker import DependencyTracker
 from .unique_upgrades import UNIQUE_UPGRADES, get_root
-from ..settings import Settings
-from PySide6.QtWidgets import QTreeWidgetItem
+from .settings_snapshot import Mode, SETTINGS
 
 from ..utils import prettify_name
 
-from typing import Dict, Optional, List
+from typing import Callable, Dict, Optional, List
 
 from collections import Counter
+from contextlib import contextmanager
+from itertools import count
 import logging
 
-import xlsxwriter
-
-from xlsxwriter.exceptions import XlsxWriterException
-
 
 class Squad:
     """
-    This object is for linking the GUI squad with equipped pilot data.
+    This object holds the equipped pilot data of a squad.
 
     This can be treated as the source of truth for equipped pilot data, indexed by
-    the tree list widget items.
+    stable integer pilot ids handed out by add_pilot.  The GUI maps its widget items to these ids.
+
+    Change callbacks are called after every change to the squad, or once at the end of a batch.
     """
-    settings = Settings()
+    settings = SETTINGS
 
     def __init__(self):
         self.__squad = {}
+        self.__pilot_ids = count(1)
+        self.__dependencies = DependencyTracker()
+        # live multisets of the names and uniqueness roots in the squad
+        self.__pilot_names = Counter()
+        self.__pilot_roots = Counter()
+        self.__upgrade_names = Counter()
+        self.__upgrade_roots = Counter()
+        # upgrade names counted per member, so a change can be subtracted again
+        self.__registered_upgrades = {}
+        self.__change_callbacks = []
+        self.__batch_depth = 0
+        self.__batch_changed = False
+
+    def add_change_callback(self, callback: Callable[["Squad"], None]):
+        """registers a callback called with the squad whenever pilots or upgrades are added or removed"""
+        self.__change_callbacks.append(callback)
+
+    def remove_change_callback(self, callback: Callable[["Squad"], None]):
+        if callback in self.__change_callbacks:
+            self.__change_callbacks.remove(callback)
+
+    def __notify_change(self):
+        if self.__batch_depth > 0:
+            self.__batch_changed = True
+            return
+        for callback in self.__change_callbacks:
+            callback(self)
 
-    def add_pilot(self, item: QTreeWidgetItem, data: PilotEquip):
+    @property
+    def in_batch(self) -> bool:
+        return self.__batch_depth > 0
+
+    @contextmanager
+    def batch(self):
+        """
+        groups several changes into one.  change callbacks are held back until the outermost batch ends and
+        are then called once if anything changed, so listeners refresh once instead of after every change.
+        """
+        self.__batch_depth += 1
+        try:
+            yield self
+        finally:
+            self.__batch_depth -= 1
+            if self.__batch_depth == 0 and self.__batch_changed:
+                self.__batch_changed = False
+                self.__notify_change()
+
+    def __register(self, data: PilotEquip):
+        upgrade_names = [upgrade.name for upgrade in data.equipped_upgrades]
+        self.__registered_upgrades[data] = upgrade_names
+        self.__pilot_names[data.pilot_name] += 1
+        self.__pilot_roots[get_root(data.pilot_name)] += 1
+        self.__upgrade_names.update(upgrade_names)
+        self.__upgrade_roots.update(get_root(name) for name in upgrade_names)
+
+    def __unregister(self, data: PilotEquip):
+        upgrade_names = self.__registered_upgrades.pop(data, [])
+        self.__pilot_names.subtract([data.pilot_name])
+        self.__pilot_roots.subtract([get_root(data.pilot_name)])
+        self.__upgrade_names.subtract(upgrade_names)
+        self.__upgrade_roots.subtract(get_root(name) for name in upgrade_names)
+        # drop the names that left the squad
+        for counter in (self.__pilot_names, self.__pilot_roots, self.__upgrade_names, self.__upgrade_roots):
+            counter += Counter()
+
+    def has_upgrade(self, upgrade_name: str) -> bool:
+        """returns True if an upgrade of this name is equipped anywhere in the squad"""
+        return self.__upgrade_names[upgrade_name] > 0
+
+    def has_name(self, name: str) -> bool:
+        """returns True if a pilot or an equipped upgrade of this name is in the squad"""
+        return self.__pilot_names[name] > 0 or self.__upgrade_names[name] > 0
+
+    def has_root(self, root: str) -> bool:
+        """returns True if a pilot or an equipped upgrade with this uniqueness root is in the squad"""
+        return self.__pilot_roots[root] > 0 or self.__upgrade_roots[root] > 0
+
+    @property
+    def dependencies(self) -> DependencyTracker:
+        """tracks which pilots need their filtered upgrades refreshed after a squad change"""
+        return self.__dependencies
+
+    def handle_pilot_changed(self, pilot_data: PilotEquip, upgrade_name: str):
+        """called by squad members when an upgrade is equipped or unequipped"""
+        self.__unregister(pilot_data)
+        self.__register(pilot_data)
+        self.__dependencies.mark_dirty(pilot_data)
+        self.__dependencies.invalidate([upgrade_name])
+        self.__notify_change()
+
+    def add_pilot(self, data: PilotEquip) -> Optional[int]:
         """
         tries to add a pilot to the squad.
-        returns True if added, False if not
+        returns the id of the added pilot, None if not added
         """
         # Check pilot limit
         if self.pilot_counts[data.pilot_name] >= data.limit:
             logging.info("Limit reached for this pilot.  Unable to equip.")
-            return False
+            return None
         # Check faction based on mode
-        if self.settings.mode == Settings.Mode.STANDARD or self.settings.mode == Settings.Mode.EPIC:
+        if self.settings.mode == Mode.STANDARD or self.settings.mode == Mode.EPIC:
             if len(self.squad_factions) > 0:
                 faction = self.squad_factions[0]
                 if data.faction_name != faction:
                     logging.info("Must equip pilots of the same faction in standard mode.  Unable to equip.")
-                    return False
+                    return None
         # Check if unique upgrade equipped
         pilot_root = get_root(data.pilot_name)
-        if get_root(data.pilot_name) in UNIQUE_UPGRADES:
-            all_equipped_upgrades = [get_root(upgrade.name) for _, pilot in self.squad_dict.items() for upgrade in pilot.equipped_upgrades]
-            all_equipped_pilots = [get_root(pilot.pilot_name) for _, pilot in self.squad_dict.items()]
-            if pilot_root in all_equipped_upgrades:
+        if pilot_root in UNIQUE_UPGRADES:
+            if self.__upgrade_roots[pilot_root] > 0:
                 logging.info(f"Unable to equip pilot.  Ensure this pilot is not already equipped as an upgrade.")
-                return False
-            elif pilot_root in all_equipped_pilots:
+                return None
+            elif self.__pilot_roots[pilot_root] > 0:
                 logging.info("Unable to equip pilot.  Ensure another version of this pilot is not already equipped.")
-                return False
-
-        self.__squad[item] = data
-        return True
-
-    def remove_pilot(self, item: QTreeWidgetItem):
+                return None
+
+        pilot_id = next(self.__pilot_ids)
+        self.__squad[pilot_id] = data
+        self.__register(data)
+        data.add_change_callback(self.handle_pilot_changed)
+        self.__dependencies.add(data)
+        self.__dependencies.invalidate([data.pilot_name] + [upgrade.name for upgrade in data.equipped_upgrades])
+        self.__notify_change()
+        return pilot_id
+
+    def remove_pilot(self, pilot_id: int) -> bool:
         # First we need to check if any upgrades are dependent on the equipped pilot
-        pilot_data_for_removal = self.get_pilot_data(item)
+        pilot_data_for_removal = self.get_pilot_data(pilot_id)
         for _, pilot_data in self.squad_dict.items():
             for upgrade in pilot_data.equipped_upgrades:
                 if pilot_data_for_removal.pilot_name in upgrade.attributes.get("squad_include", []):
                     logging.info(f"Cannot unequip a pilot with dependent upgrades - try removing {prettify_name(upgrade.name)} from {prettify_name(pilot_data.pilot_name)}.")
                     return False
-        self.__squad.pop(item, None)
+        self.__squad.pop(pilot_id, None)
+        if pilot_data_for_removal is not None:
+            self.__unregister(pilot_data_for_removal)
+            pilot_data_for_removal.remove_change_callback(self.handle_pilot_changed)
+            self.__dependencies.remove(pilot_data_for_removal)
+            self.__dependencies.invalidate([pilot_data_for_removal.pilot_name] +
+                                           [upgrade.name for upgrade in pilot_data_for_removal.equipped_upgrades])
+            self.__notify_change()
         return True
 
-    def get_pilot_data(self, item: QTreeWidgetItem) -> Optional[PilotEquip]:
-        """returns pilot data based on qtreewidgetitem name"""
-        return self.__squad.get(item)
+    def get_pilot_data(self, pilot_id: int) -> Optional[PilotEquip]:
+        """returns pilot data based on the pilot id"""
+        return self.__squad.get(pilot_id)
 
     def get_pilot_data_from_name(self, pilot_name: str) -> Optional[PilotEquip]:
         for _, pilot_data in self.squad_dict.items():
@@ -80,64 +180,19 @@ class Squad:
         return None
 
     @property
-    def squad_dict(self) -> Dict[QTreeWidgetItem, PilotEquip]:
+    def squad_dict(self) -> Dict[int, PilotEquip]:
         return self.__squad
 
     @property
     def pilot_counts(self) -> Counter:
-        names = [v.pilot_name for _, v in self.squad_dict.items()]
-        return Counter(names)
+        return self.__pilot_names.copy()
 
     @property
     def squad_factions(self) -> List[str]:
         return [pilot_data.faction_name for _, pilot_data in self.squad_dict.items()]
 
     def export_squad_as_excel(self, workbook_name: str, squad_name: str):
-        try:
-            workbook = xlsxwriter.Workbook(workbook_name)
-        except XlsxWriterException as e:
-            logging.error(f"There was a problem exporting: {e}")
-        worksheet = workbook.add_worksheet(squad_name)
-        worksheet.set_column(0, 25, 32)
-        bold = workbook.add_format({
-            'bold': True
-        })
-        left_align = workbook.add_format()
-        left_align.set_align('left')
-        worksheet.write(0, 0, 'Squad Name', bold)
-        worksheet.write(0, 1, squad_name)
-        worksheet.write(1, 0, 'Faction', bold)
-        worksheet.write(1, 1, prettify_name(self.squad_factions[0]))
-        column_headers = ["Pilot Name", "Ship Name", "Pilot Cost", "Upgrades Cost", "Upgrades"]
-        for i, header in enumerate(column_headers):
-            worksheet.write(3, i, header, bold)
-
-        row_idx = 4
-        total_pilot_cost = 0
-        total_upgrade_cost = 0
-        for _, pilot_data in self.squad_dict.items():
-            worksheet.write(row_idx, 0, prettify_name(pilot_data.pilot_name))
-            worksheet.write(row_idx, 1, prettify_name(pilot_data.ship_name))
-            worksheet.write(row_idx, 2, pilot_data.cost, left_align)
-            worksheet.write(row_idx, 3, pilot_data.total_equipped_upgrade_cost, left_align)
-            col_idx = 4
-            for upgrade in pilot_data.equipped_upgrades:
-                worksheet.write(row_idx, col_idx, prettify_name(upgrade.name))
-                col_idx += 1
-            row_idx += 1
-            total_pilot_cost += pilot_data.cost
-            total_upgrade_cost += pilot_data.total_equipped_upgrade_cost
-
-        row_idx += 1
-        worksheet.write(row_idx, 0, "Total Pilot Cost", bold)
-        worksheet.write(row_idx, 1, total_pilot_cost)
-        worksheet.write(row_idx + 1, 0, "Total Upgrade Cost", bold)
-        worksheet.write(row_idx + 1, 1, total_upgrade_cost)
-        worksheet.write(row_idx + 2, 0, "Total Squad Cost", bold)
-        worksheet.write(row_idx + 2, 1, total_pilot_cost+total_upgrade_cost)
-
-        workbook.close()
-
-        logging.info(f"Successfully exported squad to {workbook_name}")
-
-
+        # xlsxwriter and openpyxl are only loaded for workbook export, keeping the model quick to import
+        from .squad_workbook import write_squad_workbook
+        if write_squad_workbook(workbook_name, [(squad_name, self)], summary=False) is not None:
+            logging.info(f"Successfully exported squad to {workbook_name}")
@@ -0,0 +1,167 @@
+"""
+Compact, versioned squad codes for sharing and storing squads.
+
+A squad code is a url safe base64 string of a small binary blob:
+
+    version             1 byte, SquadCodec.VERSION
+    catalog fingerprint 2 bytes, big endian, see SquadCodec.fingerprint
+    name                varint byte length, utf-8 bytes
+    pilot count         varint
+    per pilot           varint pilot index, varint upgrade count, varint upgrade index per upgrade
+
+Pilots and upgrades are referenced by their position in the definition file, so a code is only valid for
+the catalog it was made with.  The fingerprint is a hash of the pilot and upgrade names in catalog order;
+decoding a code made with a different catalog fails instead of silently producing a different squad.
+Decoding yields a squad specification (see squad_spec), build_squad turns it into a squad.
+"""
+import base64
+import binascii
+import zlib
+
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .squad import Squad
+from .squad_spec import SquadBuild, build_squad, squad_spec
+from .upgrade import Upgrades
+from .xwing import XWing
+
+
+def write_varint(value: int, blob: bytearray):
+    """appends an unsigned LEB128 varint"""
+    if value < 0:
+        raise ValueError(f"Cannot encode negative value {value}.")
+    while value >= 0x80:
+        blob.append((value & 0x7F) | 0x80)
+        value >>= 7
+    blob.append(value)
+
+
+def read_varint(blob: bytes, position: int) -> Tuple[int, int]:
+    """returns the varint at position and the position after it"""
+    value = 0
+    shift = 0
+    while True:
+        if position >= len(blob):
+            raise ValueError("Squad code is truncated.")
+        byte = blob[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, position
+        shift += 7
+
+
+class SquadCodec:
+    """
+    Encodes squads to and decodes squads from squad codes for one catalog.
+    """
+    VERSION = 1
+
+    def __init__(self, xwing: XWing, upgrades: Upgrades):
+        self.__xwing = xwing
+        self.__upgrades = upgrades
+        self.__pilot_keys: List[Tuple[str, str, str]] = xwing.pilot_keys
+        self.__pilot_positions: Dict[Tuple[str, str, str], int] = {key: i for i, key in enumerate(self.__pilot_keys)}
+        self.__upgrade_names: List[str] = [upgrade["name"] for upgrade in upgrades]
+        self.__upgrade_positions: Dict[str, int] = {}
+        for i, name in enumerate(self.__upgrade_names):
+            self.__upgrade_positions.setdefault(name, i)
+        catalog = "\n".join(["|".join(key) for key in self.__pilot_keys] + self.__upgrade_names)
+        self.__fingerprint = zlib.crc32(catalog.encode("utf-8")) & 0xFFFF
+
+    @property
+    def fingerprint(self) -> int:
+        return self.__fingerprint
+
+    def encode(self, squad: Squad, name: Optional[str] = None) -> str:
+        return self.encode_spec(squad_spec(squad, name))
+
+    def decode(self, code: str) -> SquadBuild:
+        """returns the squad of a code and the errors of building it, raises ValueError for invalid codes"""
+        return build_squad(self.decode_spec(code), self.__xwing, self.__upgrades)
+
+    def iter_squads(self, codes: Iterable[str]) -> Iterator[Tuple[str, Squad]]:
+        """
+        yields a (squad name, Squad) pair per code, e.g. for write_squad_workbook.  blank lines and invalid
+        codes are skipped, unnamed squads are named after their position.
+        """
+        number = 0
+        for code in codes:
+            if not code.strip():
+                continue
+            number += 1
+            try:
+                spec = self.decode_spec(code)
+            except ValueError:
+                continue
+            squad, _ = build_squad(spec, self.__xwing, self.__upgrades)
+            yield spec["name"] or f"Squad {number}", squad
+
+    def encode_spec(self, spec: dict) -> str:
+        return base64.urlsafe_b64encode(self.encode_bytes(spec)).rstrip(b"=").decode("ascii")
+
+    def decode_spec(self, code: str) -> dict:
+        code = code.strip()
+        try:
+            blob = base64.urlsafe_b64decode(code + "=" * (-len(code) % 4))
+        except (binascii.Error, ValueError):
+            raise ValueError("Not a squad code.")
+        return self.decode_bytes(blob)
+
+    def encode_bytes(self, spec: dict) -> bytes:
+        blob = bytearray([self.VERSION])
+        blob += self.__fingerprint.to_bytes(2, "big")
+        name = (spec.get("name") or "").encode("utf-8")
+        write_varint(len(name), blob)
+        blob += name
+        pilots = spec.get("pilots", [])
+        write_varint(len(pilots), blob)
+        for pilot_spec in pilots:
+            key = (pilot_spec.get("faction", spec.get("faction")), pilot_spec.get("ship"), pilot_spec.get("pilot"))
+            if key not in self.__pilot_positions:
+                raise ValueError(f"Unknown pilot {key}.")
+            write_varint(self.__pilot_positions[key], blob)
+            upgrade_names = pilot_spec.get("upgrades", [])
+            write_varint(len(upgrade_names), blob)
+            for upgrade_name in upgrade_names:
+                if upgrade_name not in self.__upgrade_positions:
+                    raise ValueError(f"Unknown upgrade {upgrade_name}.")
+                write_varint(self.__upgrade_positions[upgrade_name], blob)
+        return bytes(blob)
+
+    def decode_bytes(self, blob: bytes) -> dict:
+        if len(blob) < 3:
+            raise ValueError("Squad code is truncated.")
+        if blob[0] != self.VERSION:
+            raise ValueError(f"Unsupported squad code version {blob[0]}.")
+        if int.from_bytes(blob[1:3], "big") != self.__fingerprint:
+            raise ValueError("Squad code was made with different definition data.")
+        name_length, position = read_varint(blob, 3)
+        if position + name_length > len(blob):
+            raise ValueError("Squad code is truncated.")
+        name = blob[position:position + name_length].decode("utf-8", errors="replace")
+        position += name_length
+        pilot_count, position = read_varint(blob, position)
+        faction_name = None
+        pilots = []
+        for _ in range(pilot_count):
+            pilot_index, position = read_varint(blob, position)
+            if pilot_index >= len(self.__pilot_keys):
+                raise ValueError(f"Unknown pilot index {pilot_index}.")
+            pilot_faction, ship_name, pilot_name = self.__pilot_keys[pilot_index]
+            upgrade_count, position = read_varint(blob, position)
+            upgrade_names = []
+            for _ in range(upgrade_count):
+                upgrade_index, position = read_varint(blob, position)
+                if upgrade_index >= len(self.__upgrade_names):
+                    raise ValueError(f"Unknown upgrade index {upgrade_index}.")
+                upgrade_names.append(self.__upgrade_names[upgrade_index])
+            pilot_spec = {"ship": ship_name, "pilot": pilot_name, "upgrades": upgrade_names}
+            if faction_name is None:
+                faction_name = pilot_faction
+            elif pilot_faction != faction_name:
+                pilot_spec["faction"] = pilot_faction
+            pilots.append(pilot_spec)
+        if position != len(blob):
+            raise ValueError("Squad code has trailing data.")
+        return {"name": name or None, "faction": faction_name, "pilots": pilots}
@@ -0,0 +1,147 @@
+"""
+Builds and validates squads from plain squad specifications.
+
+A squad specification is a JSON compatible dictionary of the form:
+{
+    'name': <squad name>,
+    'faction': <faction name>,
+    'pilots': [
+        {'ship': <ship name>, 'pilot': <pilot name>, 'upgrades': [<upgrade name>, ...]},
+        ...
+    ]
+}
+Pilots of another faction than the squad's, as freedom mode allows, carry their own 'faction' entry.
+Names use the encoded form of the definition file, see gui_text_encode.  Pilots are added in the listed
+order, each followed by its upgrades in the listed order, exactly as if they were picked in the squad
+builder: upgrades have to be available to the pilot at that point, and whenever a pilot joins, the upgrades
+the squad builder includes automatically are equipped to every pilot first, whether listed or not.
+"""
+from collections import namedtuple
+
+from typing import List, Optional, Tuple
+
+from .pilot_equip import PilotEquip
+from .squad import Squad
+from .upgrade import Upgrades
+from .xwing import XWing
+from ..utils import prettify_name
+
+SquadBuild = namedtuple('SquadBuild', ['squad', 'errors'])
+
+
+def build_squad(spec: dict, xwing: XWing, upgrades: Upgrades, squad: Optional[Squad] = None) -> SquadBuild:
+    """
+    equips every pilot and upgrade of the specification that the rules allow, in a single squad batch.
+    pass in a squad to build into it instead of a new one.
+    returns the squad and a list of error messages for everything that could not be equipped.
+    """
+    if squad is None:
+        squad = Squad()
+    with squad.batch():
+        errors = _build(spec, xwing, upgrades, squad)
+    return SquadBuild(squad, errors)
+
+
+def _build(spec: dict, xwing: XWing, upgrades: Upgrades, squad: Squad) -> List[str]:
+    errors = []
+    faction_name = spec.get("faction")
+    for pilot_spec in spec.get("pilots", []):
+        pilot_faction_name = pilot_spec.get("faction", faction_name)
+        ship_name = pilot_spec.get("ship")
+        pilot_name = pilot_spec.get("pilot")
+        ship = xwing.get_ship(pilot_faction_name, ship_name)
+        pilot = xwing.get_pilot(pilot_faction_name, ship_name, pilot_name)
+        if pilot is None:
+            errors.append(f"Unknown pilot {prettify_name(str(pilot_name))} ({prettify_name(str(ship_name))}) "
+                          f"for faction {prettify_name(str(pilot_faction_name))}.")
+            continue
+        pilot_data = PilotEquip(ship, pilot)
+        if squad.add_pilot(pilot_data) is None:
+            errors.append(f"Unable to add {prettify_name(pilot_name)} to the squad.")
+            continue
+        auto_included = [name for pilot, name in apply_auto_includes(squad, upgrades) if pilot is pilot_data]
+        for upgrade_name in pilot_spec.get("upgrades", []):
+            if upgrade_name in auto_included:
+                continue
+            error = equip_upgrade(squad, upgrades, pilot_data, upgrade_name)
+            if error is not None:
+                errors.append(error)
+    upgrades.refresh_filtered_upgrades(squad)
+    return errors
+
+
+def apply_auto_includes(squad: Squad, upgrades: Upgrades) -> List[Tuple[PilotEquip, str]]:
+    """
+    equips the automatically included upgrades available to the squad pilots, as the squad builder does
+    whenever a pilot joins the squad.  the filtered upgrades are up to date afterwards.
+    returns the (pilot, upgrade name) pairs equipped
+    """
+    equipped = []
+    upgrades.refresh_filtered_upgrades(squad)
+    for pilot_data in squad.squad_dict.values():
+        equipped_names = [upgrade.name for upgrade in pilot_data.equipped_upgrades]
+        pilot_equipped = False
+        for upgrade in pilot_data.filtered_upgrades:
+            if upgrade.get("autoinclude", "False") != "True" or upgrade["name"] in equipped_names:
+                continue
+            if pilot_data.equip_upgrade(upgrades.get_upgrade_slots(upgrade), upgrade["name"], upgrade["cost"], upgrade):
+                equipped.append((pilot_data, upgrade["name"]))
+                pilot_equipped = True
+        if pilot_equipped:
+            # equipping changes the upgrades available to the other pilots
+            upgrades.refresh_filtered_upgrades(squad)
+    return equipped
+
+
+def equip_upgrade(squad: Squad, upgrades: Upgrades, pilot_data: PilotEquip, upgrade_name: str) -> Optional[str]:
+    """equips an upgrade if it is available to the pilot, returns an error message otherwise"""
+    upgrade = upgrades.get_upgrade(upgrade_name)
+    if upgrade is None:
+        return f"Unknown upgrade {prettify_name(str(upgrade_name))}."
+    upgrades.refresh_filtered_upgrades(squad)
+    available = next((u for u in pilot_data.filtered_upgrades if u["name"] == upgrade_name), None)
+    if available is None:
+        return f"{prettify_name(upgrade_name)} is not available to {prettify_name(pilot_data.pilot_name)}."
+    if not pilot_data.equip_upgrade(upgrades.get_upgrade_slots(upgrade), upgrade_name, available["cost"], available):
+        return f"Unable to equip {prettify_name(upgrade_name)} to {prettify_name(pilot_data.pilot_name)}."
+    return None
+
+
+def squad_points(squad: Squad) -> int:
+    return sum(pilot_data.cost_with_upgrades for pilot_data in squad.squad_dict.values())
+
+
+def validate_squad(spec: dict, xwing: XWing, upgrades: Upgrades, max_points: Optional[int] = None) -> dict:
+    """
+    returns a JSON compatible report of the form:
+    {'name': <squad name>, 'valid': <bool>, 'points': <total points>, 'errors': [<message>, ...]}
+    """
+    squad, errors = build_squad(spec, xwing, upgrades)
+    points = squad_points(squad)
+    if not spec.get("pilots"):
+        errors.append("The squad has no pilots.")
+    if max_points is not None and points > max_points:
+        errors.append(f"The squad costs {points} points, the limit is {max_points}.")
+    return {
+        "name": spec.get("name"),
+        "valid": not errors,
+        "points": points,
+        "errors": errors,
+    }
+
+
+def squad_spec(squad: Squad, name: Optional[str] = None) -> dict:
+    """returns the specification of a squad, the inverse of build_squad"""
+    factions = squad.squad_factions
+    faction_name = factions[0] if factions else None
+    pilots = []
+    for pilot_data in squad.squad_dict.values():
+        pilot_spec = {
+            "ship": pilot_data.ship_name,
+            "pilot": pilot_data.pilot_name,
+            "upgrades": [upgrade.name for upgrade in pilot_data.equipped_upgrades],
+        }
+        if pilot_data.faction_name != faction_name:
+            pilot_spec["faction"] = pilot_data.faction_name
+        pilots.append(pilot_spec)
+    return {"name": name, "faction": faction_name, "pilots": pilots}
@@ -0,0 +1,214 @@
+"""
+Writes squads to and reads squads from Excel workbooks.
+
+Every squad gets a worksheet of its own.  Workbooks are written with xlsxwriter's constant memory mode,
+which flushes every row to disk once the next row is started, and opened with openpyxl's read-only mode,
+streaming each sheet row by row.  Memory stays flat for workbooks with hundreds of squads either way.
+Constant memory mode keeps a temporary file open per worksheet until the workbook is closed, so a workbook
+holds at most MAX_SQUAD_SHEETS squads to stay clear of open file limits.
+
+When reading, every worksheet laid out like an exported squad is read as a squad specification
+(see squad_spec), other sheets are skipped.
+"""
+import logging
+import os
+import re
+
+import xlsxwriter
+from openpyxl import load_workbook
+from xlsxwriter.exceptions import XlsxWriterException
+
+from typing import Callable, Iterable, Iterator, List, Optional
+
+from ..utils import gui_text_encode, prettify_name
+
+SQUAD_NAME_HEADER = "Squad Name"
+FACTION_HEADER = "Faction"
+# zero based layout of an exported squad sheet
+FIRST_PILOT_ROW = 4
+PILOT_COLUMN = 0
+SHIP_COLUMN = 1
+FIRST_UPGRADE_COLUMN = 4
+SQUAD_COLUMN_HEADERS = ["Pilot Name", "Ship Name", "Pilot Cost", "Upgrades Cost", "Upgrades"]
+SUMMARY_SHEET_NAME = "Summary"
+SUMMARY_COLUMN_HEADERS = ["Squad", "Sheet", "Faction", "Pilots", "Pilot Cost", "Upgrades Cost", "Total Cost"]
+# excel limits worksheet names to 31 characters and forbids some characters
+MAX_SHEET_NAME_LENGTH = 31
+INVALID_SHEET_NAME_CHARACTERS = re.compile(r"[\[\]:*?/\\]")
+# every worksheet holds an open temporary file while writing
+MAX_SQUAD_SHEETS = 500
+
+
+def write_squad_workbook(filename, squads: Iterable[tuple], total: int = 0, summary: bool = True,
+                         progress_callback: Optional[Callable[[int, int], None]] = None,
+                         is_cancelled: Optional[Callable[[], bool]] = None) -> Optional[int]:
+    """
+    writes (squad name, Squad) pairs to one workbook, a sheet per squad behind an optional summary sheet.
+    squads can be a generator, only the squad being written is held in memory.
+    progress_callback is called with (squads written, total) after every squad, total is 0 if unknown.
+    returns the number of squads written, None if cancelled through is_cancelled or the export failed.
+    raises ValueError for more than MAX_SQUAD_SHEETS squads, nothing is written then
+    """
+    if total > MAX_SQUAD_SHEETS:
+        raise ValueError(f"A workbook holds at most {MAX_SQUAD_SHEETS} squads, not {total}.")
+    workbook = xlsxwriter.Workbook(filename, {'constant_memory': True})
+    formats = {
+        'bold': workbook.add_format({'bold': True}),
+        'left_align': workbook.add_format({'align': 'left'}),
+    }
+    summary_sheet = None
+    if summary:
+        summary_sheet = workbook.add_worksheet(SUMMARY_SHEET_NAME)
+        summary_sheet.set_column(0, len(SUMMARY_COLUMN_HEADERS) - 1, 20)
+        summary_sheet.write_row(0, 0, SUMMARY_COLUMN_HEADERS, formats['bold'])
+    sheet_names = {SUMMARY_SHEET_NAME.lower()} if summary else set()
+    written = 0
+    for squad_name, squad in squads:
+        if is_cancelled is not None and is_cancelled():
+            discard_workbook(workbook, filename)
+            logging.info("Export cancelled.")
+            return None
+        if written >= MAX_SQUAD_SHEETS:
+            discard_workbook(workbook, filename)
+            raise ValueError(f"A workbook holds at most {MAX_SQUAD_SHEETS} squads.")
+        sheet_name = unique_sheet_name(squad_name, sheet_names)
+        worksheet = workbook.add_worksheet(sheet_name)
+        pilot_cost, upgrade_cost = write_squad_sheet(worksheet, squad, squad_name, formats)
+        written += 1
+        if summary_sheet is not None:
+            factions = squad.squad_factions
+            summary_sheet.write_row(written, 0, [
+                squad_name, sheet_name, prettify_name(factions[0]) if factions else "", len(squad.squad_dict),
+                pilot_cost, upgrade_cost, pilot_cost + upgrade_cost])
+        if progress_callback is not None:
+            progress_callback(written, total)
+    try:
+        workbook.close()
+    except XlsxWriterException as e:
+        logging.error(f"There was a problem exporting: {e}")
+        return None
+    return written
+
+
+def discard_workbook(workbook, filename):
+    """closes a partly written workbook, releasing its temporary files, and removes it"""
+    try:
+        workbook.close()
+    except (OSError, XlsxWriterException) as e:
+        logging.debug(f"Unable to close discarded workbook {filename}: {e}")
+    try:
+        os.remove(filename)
+    except OSError:
+        pass
+
+
+def write_squad_sheet(worksheet, squad, squad_name: str, formats: dict) -> tuple:
+    """
+    writes a squad in the exported squad layout, strictly row by row as constant memory mode requires.
+    returns the total pilot and upgrade costs
+    """
+    bold = formats['bold']
+    left_align = formats['left_align']
+    worksheet.set_column(0, 25, 32)
+    worksheet.write(0, 0, SQUAD_NAME_HEADER, bold)
+    worksheet.write(0, 1, squad_name)
+    worksheet.write(1, 0, FACTION_HEADER, bold)
+    factions = squad.squad_factions
+    worksheet.write(1, 1, prettify_name(factions[0]) if factions else "")
+    worksheet.write_row(FIRST_PILOT_ROW - 1, 0, SQUAD_COLUMN_HEADERS, bold)
+
+    row_idx = FIRST_PILOT_ROW
+    total_pilot_cost = 0
+    total_upgrade_cost = 0
+    for pilot_data in squad.squad_dict.values():
+        worksheet.write(row_idx, PILOT_COLUMN, prettify_name(pilot_data.pilot_name))
+        worksheet.write(row_idx, SHIP_COLUMN, prettify_name(pilot_data.ship_name))
+        worksheet.write(row_idx, 2, pilot_data.cost, left_align)
+        worksheet.write(row_idx, 3, pilot_data.total_equipped_upgrade_cost, left_align)
+        worksheet.write_row(row_idx, FIRST_UPGRADE_COLUMN,
+                            [prettify_name(upgrade.name) for upgrade in pilot_data.equipped_upgrades])
+        row_idx += 1
+        total_pilot_cost += pilot_data.cost
+        total_upgrade_cost += pilot_data.total_equipped_upgrade_cost
+
+    row_idx += 1
+    worksheet.write(row_idx, 0, "Total Pilot Cost", bold)
+    worksheet.write(row_idx, 1, total_pilot_cost)
+    worksheet.write(row_idx + 1, 0, "Total Upgrade Cost", bold)
+    worksheet.write(row_idx + 1, 1, total_upgrade_cost)
+    worksheet.write(row_idx + 2, 0, "Total Squad Cost", bold)
+    worksheet.write(row_idx + 2, 1, total_pilot_cost + total_upgrade_cost)
+    return total_pilot_cost, total_upgrade_cost
+
+
+def unique_sheet_name(squad_name: str, used_names: set) -> str:
+    """
+    returns a valid worksheet name for the squad that is not in used_names, compared case insensitively,
+    and adds it to used_names
+    """
+    base_name = INVALID_SHEET_NAME_CHARACTERS.sub("_", squad_name or "").strip("'")[:MAX_SHEET_NAME_LENGTH] or "Squad"
+    name = base_name
+    number = 2
+    while name.lower() in used_names:
+        suffix = f" ({number})"
+        name = base_name[:MAX_SHEET_NAME_LENGTH - len(suffix)] + suffix
+        number += 1
+    used_names.add(name.lower())
+    return name
+
+
+def iter_squad_workbook(filename) -> Iterator[dict]:
+    """yields the squad specification of every squad sheet in the workbook, sheets of other layouts are skipped"""
+    workbook = load_workbook(filename, read_only=True, data_only=True)
+    try:
+        for worksheet in workbook.worksheets:
+            spec = read_squad_rows(worksheet.iter_rows(values_only=True))
+            if spec is not None:
+                yield spec
+    finally:
+        # read-only workbooks keep the file open until closed
+        workbook.close()
+
+
+def read_squad_workbook(filename) -> List[dict]:
+    return list(iter_squad_workbook(filename))
+
+
+def read_squad_rows(rows: Iterable[tuple]) -> Optional[dict]:
+    """returns the squad specification of the rows of a squad sheet, None if the rows are not a squad sheet"""
+    rows = iter(rows)
+    name_row = next(rows, ())
+    faction_row = next(rows, ())
+    if cell(name_row, 0) != SQUAD_NAME_HEADER or cell(faction_row, 0) != FACTION_HEADER:
+        return None
+    pilots = []
+    for row_idx, row in enumerate(rows, start=2):
+        if row_idx < FIRST_PILOT_ROW:
+            continue
+        pilot_name = cell(row, PILOT_COLUMN)
+        if pilot_name is None:
+            break
+        upgrade_names = []
+        for value in row[FIRST_UPGRADE_COLUMN:]:
+            if value is None:
+                break
+            upgrade_names.append(gui_text_encode(str(value)))
+        pilots.append({
+            "ship": gui_text_encode(str(cell(row, SHIP_COLUMN))),
+            "pilot": gui_text_encode(pilot_name),
+            "upgrades": upgrade_names,
+        })
+    squad_name = cell(name_row, 1)
+    faction_name = cell(faction_row, 1)
+    return {
+        "name": squad_name,
+        "faction": gui_text_encode(faction_name) if faction_name is not None else None,
+        "pilots": pilots,
+    }
+
+
+def cell(row: tuple, column: int) -> Optional[str]:
+    """returns the cell value of a row as text, None for empty or missing cells"""
+    if column >= len(row) or row[column] is None:
+        return None
+    return str(row[column])
@@ -1,3 +1,7 @@
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
 def get_root(name: str):
     """returns the root of a name, example:
     'gar saxon (crew)' becomes 'gar saxon'
@@ -10,7 +14,7 @@ def get_root(name: str):
 
     return ' '.join(name_arr[:idx])
 
-UNIQUE_UPGRADES = [
+UNIQUE_UPGRADES = frozenset([
     "general grievous",
     "asajj ventress",
     "sabine wren",
@@ -66,4 +70,4 @@ UNIQUE_UPGRADES = [
     "grand inquisitor",
     "count dooku",
     "darth vader"
-]
\ No newline at end of file
+])
@@ -1,15 +1,45 @@
 from .pilot_equip import PilotEquip
 from .squad import Squad
 from ..utils import prettify_name
-from ..settings import Settings
-from .upgrade_filters import (upgrade_slot_filter, name_filter, multiple_name_filter, actions_filter,
-                              statistics_filter_simple, statistics_filter_adv, limit_filter, bool_string_filter)
+from .settings_snapshot import Mode, SETTINGS
+from .upgrade_filters import bool_string_filter
+from .restrictions import compile_restrictions, Restriction
+from .upgrade_index import UpgradeIndex
+from .costs import compile_cost, resolve_cost
 
 from .unique_upgrades import UNIQUE_UPGRADES, get_root
 
 from typing import List, Optional, Union, Dict
 
-from collections import defaultdict
+from collections import Counter, defaultdict
+from collections.abc import Mapping
+
+
+class CostedUpgrade(Mapping):
+    """
+    Read-only view of an upgrade dictionary with the cost resolved for a specific pilot.
+
+    The view references the shared upgrade record instead of copying it, only the cost is stored.
+    """
+    __slots__ = ("upgrade", "cost")
+
+    def __init__(self, upgrade: Mapping, cost: int):
+        self.upgrade = upgrade
+        self.cost = cost
+
+    def __getitem__(self, key):
+        if key == "cost":
+            return self.cost
+        return self.upgrade[key]
+
+    def __iter__(self):
+        return iter(self.upgrade)
+
+    def __len__(self):
+        return len(self.upgrade)
+
+    def __repr__(self):
+        return f"CostedUpgrade({self.upgrade.get('name')!r}, cost={self.cost!r})"
 
 
 class Upgrades:
@@ -18,10 +48,26 @@ class Upgrades:
     filtered lists of upgrades based on pilot and upgrade slot.
     """
 
-    settings = Settings()
+    settings = SETTINGS
 
     def __init__(self, upgrades: List[dict]):
         self.__upgrades_list = upgrades
+        self.__positions = {}
+        for i, upgrade in enumerate(upgrades):
+            self.__positions.setdefault(self.get_upgrade_name(upgrade), i)
+        # Only the restrictions that can actually fail, compiled once per load.
+        self.__compiled_restrictions = [compile_restrictions(upgrade) for upgrade in upgrades]
+        self.__index = UpgradeIndex(upgrades)
+        self.__costs = [compile_cost(upgrade.get("cost")) for upgrade in upgrades]
+        # (faction, ship, pilot, mode) -> positions of the upgrades passing every static restriction
+        self.__static_eligibility = {}
+        # (faction, ship, pilot, mode, pilot slot counts) -> positions of the static eligible upgrades that fit
+        self.__slot_eligibility = {}
+        self.__slot_counts = [Counter(self.get_upgrade_slots(upgrade) or []) for upgrade in upgrades]
+        # uniqueness root of the unique and solitary upgrades, None for the others
+        self.__unique_roots = [self.__unique_root(upgrade) for upgrade in upgrades]
+        # names and uniqueness roots whose presence in the squad decides whether an upgrade is available
+        self.__dependencies = [self.__squad_dependencies(upgrade) for upgrade in upgrades]
 
     def __iter__(self):
         return (upgrade for upgrade in self.upgrades_list)
@@ -58,136 +104,127 @@ class Upgrades:
         return dict(d)
 
     def get_upgrade(self, upgrade_name: str) -> Optional[dict]:
-        for upgrade in self.upgrades_list:
-            if self.get_upgrade_name(upgrade) == upgrade_name:
-                return upgrade
-        return None
+        i = self.__positions.get(upgrade_name)
+        return None if i is None else self.upgrades_list[i]
 
-    def filtered_upgrades_by_pilot(self, pilot: PilotEquip, squad: Squad) -> List[dict]:
-        filtered = []
-        for upgrade in self.upgrades_list:
-            valid = upgrade_slot_filter(self.get_upgrade_slots(upgrade), pilot.upgrade_slots)
-            if bool_string_filter(upgrade["epic"]) and self.settings.mode != Settings.Mode.EPIC:
-                valid = False
-
-            solitary = upgrade.get("solitary", "False") == "True"
-            upgrade_root = get_root(upgrade['name'])
-            if solitary or upgrade_root in UNIQUE_UPGRADES:
-                equipped_upgrade_names = [val.name for _, member in squad.squad_dict.items() for val in member.equipped_upgrades]
-                equipped_pilot_names = [pilot.pilot_name for _, pilot in squad.squad_dict.items()]
-                if upgrade['name'] in equipped_upgrade_names:
-                    valid = False
-                combined_roots = [get_root(i) for i in equipped_pilot_names + equipped_upgrade_names]
-                if upgrade_root in combined_roots:
-                    valid = False
-
-            restrictions = self.get_upgrade_restrictions(upgrade)
-            # TODO: Fill in the rest of the conditionals
-            for key, value in restrictions.items():
-                if key == "limit":
-                    restriction = {upgrade["name"]: value}
-                    upgrade_arr = [upgrade.name for upgrade in pilot.equipped_upgrades]
-                    if not limit_filter(restriction, upgrade_arr):
-                        valid = False
-                elif key == "pilot_limit":
-                    pass
-                elif key == "pilot_initiative":
-                    initiative_stat = {key: pilot.initiative}
-                    if not statistics_filter_simple(value, initiative_stat):
-                        valid = False
-                elif key == "factions":
-                    squad_include = upgrade.get("squad_include", [])
-                    if squad_include:
-                        if not name_filter(value, pilot.faction_name):
-                            squad_names = []
-                            for _, member in squad.squad_dict.items():
-                                squad_names.append(member.pilot_name)
-                                for val in member.equipped_upgrades:
-                                    squad_names.append(val.name)
-                            included = [name in squad_names for name in squad_include]
-                            if not any(included):
-                                valid = False
-                    elif not name_filter(value, pilot.faction_name):
-                        valid = False
-                elif key == "ships":
-                    if not name_filter(value, pilot.ship_name):
-                        valid = False
-                elif key == "base_sizes":
-                    if not name_filter(value, pilot.base_size):
-                        valid = False
-                elif key == "attacks":
-                    # NOTE: we decoupled attacks and arc_types in the filtering.  This may need to be changed in the future.
-                    attacks_stat = {key: pilot.max_attack}
-                    if not statistics_filter_simple(value, attacks_stat):
-                        valid = False
-                elif key == "arc_types":
-                    if not multiple_name_filter(value, pilot.arc_types):
-                        valid = False
-                elif key in ["agility", "hull"]:
-                    if not statistics_filter_simple(value, pilot.get_statistic(pilot.statistics, key)):
-                        valid = False
-                elif key in ["shield", "force", "energy", "charge"]:
-                    test_statistic = pilot.get_statistic(pilot.statistics, key)
-                    if not statistics_filter_adv(value, test_statistic[key]):
-                        valid = False
-                elif key == "actions":
-                    if not actions_filter(value, pilot.actions):
-                        valid = False
-                elif key == "keywords":
-                    if not multiple_name_filter(value, pilot.keywords):
-                        valid = False
-                elif key == "other_equipped_upgrades":
-                    if not name_filter(value, pilot.equipped_upgrades):
-                        valid = False
-
-            if valid:
-                # Create a copy so updated variable costs do not change in the full list.
-                upgrade_copy = upgrade.copy()
-                upgrade_copy["cost"] = self.get_filtered_upgrade_cost(upgrade, pilot)
-                filtered.append(upgrade_copy)
+    def static_eligible_upgrades(self, pilot: PilotEquip) -> List[int]:
+        """
+        returns the positions of the upgrades passing every restriction that only depends on the pilot
+        and the game mode.  the result is cached for the lifetime of the upgrades.
+        """
+        mode = self.settings.mode
+        key = (pilot.faction_name, pilot.ship_name, pilot.pilot_name, mode)
+        eligible = self.__static_eligibility.get(key)
+        if eligible is None:
+            eligible = []
+            for i in self.__index.candidates(pilot, include_slots=False):
+                upgrade = self.upgrades_list[i]
+                if bool_string_filter(upgrade["epic"]) and mode != Mode.EPIC:
+                    continue
+                if not all(r.check(pilot, None) for r in self.__compiled_restrictions[i] if not r.dynamic):
+                    continue
+                eligible.append(i)
+            self.__static_eligibility[key] = eligible
+        return eligible
 
-        return filtered
+    def slot_eligible_upgrades(self, pilot: PilotEquip) -> List[int]:
+        """
+        returns the positions of the static eligible upgrades the pilot has enough slots for.  the pilot's
+        slots change with its equipped upgrades, the result is cached per set of slots.
+        """
+        pilot_slot_counts = Counter(pilot.upgrade_slots)
+        key = (pilot.faction_name, pilot.ship_name, pilot.pilot_name, self.settings.mode,
+               frozenset(pilot_slot_counts.items()))
+        eligible = self.__slot_eligibility.get(key)
+        if eligible is None:
+            slot_candidates = self.__index.slots.candidates(pilot_slot_counts)
+            eligible = [
+                i for i in self.static_eligible_upgrades(pilot)
+                if i in slot_candidates
+                and all(count <= pilot_slot_counts[slot] for slot, count in self.__slot_counts[i].items())
+            ]
+            self.__slot_eligibility[key] = eligible
+        return eligible
 
-    def filtered_upgrades_by_pilot_and_slot(self, pilot: PilotEquip, slot: str) -> List[dict]:
+    def filtered_upgrades_by_pilot(self, pilot: PilotEquip, squad: Squad) -> List[CostedUpgrade]:
         filtered = []
-        for upgrade in pilot.filtered_upgrades:
-            valid = True
-            upgrade_slots = self.get_upgrade_slots(upgrade)
-
-            # Now filter the list for the slot we are actually interested in
-            valid_slots = []
-            for slot_type in upgrade_slots:
-                if slot_type != slot:
-                    valid_slots.append(False)
-                else:
-                    valid_slots.append(True)
-            if not any(valid_slots):
-                valid = False
-
-            if valid:
-                # Create a copy so updated variable costs do not change in the full list.
-                upgrade_copy = upgrade.copy()
-                upgrade_copy["cost"] = self.get_filtered_upgrade_cost(upgrade, pilot)
-                filtered.append(upgrade_copy)
+        # Static and slot checks are cached per pilot, only the squad and equipped upgrade checks run here.
+        for i in self.slot_eligible_upgrades(pilot):
+            upgrade = self.upgrades_list[i]
+            unique_root = self.__unique_roots[i]
+            if unique_root is not None and (squad.has_upgrade(upgrade['name']) or squad.has_root(unique_root)):
+                continue
+
+            if not all(r.check(pilot, squad) for r in self.__compiled_restrictions[i] if r.dynamic):
+                continue
+
+            # A view carries the pilot's cost so variable costs do not change in the full list.
+            filtered.append(CostedUpgrade(upgrade, resolve_cost(self.__costs[i], pilot)))
+
         return filtered
 
+    @staticmethod
+    def __unique_root(upgrade: dict) -> Optional[str]:
+        upgrade_root = get_root(upgrade["name"])
+        if upgrade.get("solitary", "False") == "True" or upgrade_root in UNIQUE_UPGRADES:
+            return upgrade_root
+        return None
+
+    @staticmethod
+    def __squad_dependencies(upgrade: dict):
+        names = set()
+        roots = set()
+        upgrade_root = Upgrades.__unique_root(upgrade)
+        if upgrade_root is not None:
+            names.add(upgrade["name"])
+            roots.add(upgrade_root)
+        if any(restriction.key == "factions" and restriction.dynamic for restriction in compile_restrictions(upgrade)):
+            names.update(upgrade.get("squad_include", []))
+        return names, roots
+
+    def refresh_filtered_upgrades(self, squad: Squad) -> List[PilotEquip]:
+        """
+        updates the filtered upgrades of the squad members invalidated since the last refresh, see
+        DependencyTracker.  returns the refreshed pilots.
+        """
+        dependencies = squad.dependencies
+        # a new game mode or reloaded upgrades invalidate every pilot
+        context = (self, self.settings.mode)
+        if dependencies.context != context:
+            dependencies.context = context
+            dependencies.mark_all_dirty()
+        refreshed = dependencies.pop_dirty()
+        for pilot in refreshed:
+            pilot.filtered_upgrades = self.filtered_upgrades_by_pilot(pilot, squad)
+            # the pilot's slots only change with its own upgrades, which invalidate it anyway
+            names = set()
+            roots = set()
+            for i in self.slot_eligible_upgrades(pilot):
+                upgrade_names, upgrade_roots = self.__dependencies[i]
+                names.update(upgrade_names)
+                roots.update(upgrade_roots)
+            dependencies.record(pilot, names, roots)
+        return refreshed
+
+    def filtered_upgrades_by_pilot_and_slot(self, pilot: PilotEquip, slot: str) -> List[CostedUpgrade]:
+        """returns the pilot's filtered upgrades consuming the given slot, costs are already resolved for the pilot"""
+        return pilot.filtered_upgrades_by_slot.get(slot, [])
+
     @staticmethod
     def get_upgrade_restrictions(upgrade: dict):
         return upgrade.get("restrictions")
 
+    def get_compiled_restrictions(self, upgrade_name: str) -> List[Restriction]:
+        """returns the active restrictions of an upgrade, see compile_restrictions"""
+        i = self.__positions.get(upgrade_name)
+        return [] if i is None else self.__compiled_restrictions[i]
+
     @staticmethod
     def get_filtered_upgrade_cost(upgrade: dict, pilot: PilotEquip) -> int:
         """
         Returns the final cost of an upgrade based on the equipped pilot
         """
-        cost = upgrade.get("cost")
-        if type(cost) is int:
-            return cost
-        else:
-            attribute = cost.get("attribute")
-            pilot_value = str(pilot.get_attribute(attribute))
-            cost_int = cost.get(pilot_value)
-            return cost_int
+        return resolve_cost(compile_cost(upgrade.get("cost")), pilot)
 
     @staticmethod
     def get_upgrade_cost(upgrade: dict) -> Union[int, str]:
@@ -0,0 +1,84 @@
+"""
+Inverted indexes over the upgrade list.
+
+Most upgrades are ruled out for a pilot by its slots, faction, ship, base size, arc types or keywords
+alone.  UpgradeIndex maps each of those attribute values to the set of upgrade positions (indices into
+the upgrades list) that could accept it, so filtering only has to run the full checks on the
+intersection of the candidate sets.
+"""
+from collections import defaultdict
+
+from typing import Iterable, List, Set
+
+
+class InvertedIndex:
+    """
+    Maps attribute values to the upgrades that accept them.  Upgrades that do not restrict the
+    attribute are candidates for any value.
+    """
+
+    def __init__(self):
+        self.__index = defaultdict(set)
+        self.__unrestricted = set()
+
+    def add(self, upgrade_idx: int, values: Iterable[str]):
+        """registers an upgrade, an empty list of values means the attribute is unrestricted"""
+        values = list(values)
+        if not values:
+            self.__unrestricted.add(upgrade_idx)
+        for value in values:
+            self.__index[value].add(upgrade_idx)
+
+    def candidates(self, values: Iterable[str]) -> Set[int]:
+        """returns the upgrades accepting at least one of the given values"""
+        result = set(self.__unrestricted)
+        for value in values:
+            result.update(self.__index.get(value, ()))
+        return result
+
+
+class UpgradeIndex:
+    """
+    Candidate lookup for a list of upgrade dictionaries.
+
+    The candidates are a superset of the upgrades a pilot may equip, every candidate still needs
+    to pass the full upgrade filter.
+    """
+
+    def __init__(self, upgrades: List[dict]):
+        self.slots = InvertedIndex()
+        self.factions = InvertedIndex()
+        self.ships = InvertedIndex()
+        self.base_sizes = InvertedIndex()
+        self.arc_types = InvertedIndex()
+        self.keywords = InvertedIndex()
+        for i, upgrade in enumerate(upgrades):
+            restrictions = upgrade.get("restrictions") or {}
+            self.slots.add(i, upgrade.get("upgrade_slot_types") or [])
+            # upgrades with a squad include can be equipped out of faction, the squad decides that
+            if upgrade.get("squad_include"):
+                self.factions.add(i, [])
+            else:
+                self.factions.add(i, restrictions.get("factions") or [])
+            self.ships.add(i, restrictions.get("ships") or [])
+            self.base_sizes.add(i, restrictions.get("base_sizes") or [])
+            self.arc_types.add(i, restrictions.get("arc_types") or [])
+            self.keywords.add(i, restrictions.get("keywords") or [])
+
+    def candidates(self, pilot, include_slots: bool = True) -> List[int]:
+        """
+        returns the sorted positions of the upgrades that may fit the pilot.
+        the pilot's upgrade slots change with its equipped upgrades, pass include_slots=False to
+        only use the attributes printed on the pilot card.
+        """
+        candidate_sets = [
+            self.factions.candidates([pilot.faction_name]),
+            self.ships.candidates([pilot.ship_name]),
+            self.base_sizes.candidates([pilot.base_size]),
+            self.arc_types.candidates(pilot.arc_types),
+            self.keywords.candidates(pilot.keywords),
+        ]
+        if include_slots:
+            candidate_sets.append(self.slots.candidates(set(pilot.upgrade_slots)))
+        candidate_sets.sort(key=len)
+        return sorted(set.intersection(*candidate_sets))
@@ -1,9 +1,11 @@
-import json
+from pathlib import Path
 
-from typing import List, Optional
+from typing import List, Optional, Dict, Tuple
 
 from .faction import Faction
 from .ship import Ship
+from .catalog_cache import load_catalog
+from .settings_snapshot import Mode, SETTINGS
 
 from ..utils import prettify_name
 
@@ -11,9 +13,29 @@ from collections import defaultdict
 
 
 class XWing:
+    """
+    Entry point to the definition data.
+
+    Factions and ships are built once when the data is loaded and indexed by name, so
+    faction, ship and pilot lookups are hash map lookups instead of list scans.
+    """
+    settings = SETTINGS
 
     def __init__(self, data):
         self.data = data
+        self.__factions: Dict[str, Faction] = {}
+        self.__ship_index: Dict[Tuple[str, str], Ship] = {}
+        self.__pilot_index: Dict[Tuple[str, str, str], dict] = {}
+        self.__build_index()
+
+    def __build_index(self):
+        for faction_data in self.data["factions"]:
+            faction = Faction(faction_data)
+            self.__factions[faction.faction_name] = faction
+            for ship in faction.all_ships:
+                self.__ship_index[(faction.faction_name, ship.ship_name)] = ship
+                for pilot in ship.pilots:
+                    self.__pilot_index[(faction.faction_name, ship.ship_name, pilot["name"])] = pilot
 
     @property
     def faction_names(self) -> List[str]:
@@ -23,27 +45,35 @@ class XWing:
     def upgrades(self):
         return self.data["upgrades"]
 
+    @property
+    def pilot_keys(self) -> List[Tuple[str, str, str]]:
+        """returns a (faction name, ship name, pilot name) tuple for every pilot in the data, regardless of mode."""
+        return list(self.__pilot_index.keys())
+
     def get_faction(self, faction_name: str) -> Optional[Faction]:
-        for i, test_faction in enumerate(self.data["factions"]):
-            if faction_name == test_faction["name"]:
-                return Faction(test_faction)
-        return None
+        return self.__factions.get(faction_name)
 
     def get_ship(self, faction_name: str, ship_name: str) -> Optional[Ship]:
-        faction = self.get_faction(faction_name)
-        ship = faction.get_ship(ship_name)
+        ship = self.__ship_index.get((faction_name, ship_name))
+        if ship is None:
+            return None
+        if ship.base == "huge" and self.settings.mode != Mode.EPIC:
+            return None
         return ship
 
     @classmethod
-    def launch_xwing_data(cls, data_path: str):
-        with open(data_path) as file:
-            data = json.load(file)
-        return cls(data)
-
-    def get_pilot(self, faction_name: str, ship_name: str, pilot_name: str):
-        faction = self.get_faction(faction_name)
-        ship = faction.get_ship(ship_name)
-        return ship.get_pilot_data(pilot_name)
+    def launch_xwing_data(cls, data_path: str, cache_path: Optional[Path] = None):
+        """
+        Loads the definition file.  The indexed data is read from the on-disk catalog cache
+        when the definition file has not changed since the cache was written.
+        """
+        return load_catalog(data_path, cls, cache_path)
+
+    def get_pilot(self, faction_name: str, ship_name: str, pilot_name: str) -> Optional[dict]:
+        # get_ship applies the game mode restrictions (huge ships outside of epic)
+        if self.get_ship(faction_name, ship_name) is None:
+            return None
+        return self.__pilot_index.get((faction_name, ship_name, pilot_name))
 
     @property
     def faction_ship_pilot_dict(self):
@@ -0,0 +1,92 @@
+from collections import OrderedDict
+
+from PySide6 import QtGui
+
+from typing import Hashable, Optional, Union
+
+MEGABYTE = 1024 * 1024
+DEFAULT_BUDGET = 128 * MEGABYTE
+
+
+class PixmapCache:
+    """
+    Least recently used cache of decoded images within a byte budget.
+
+    image_path_to_qpixmap keys it on (path, tint color, scale setting), so rebuilding trees and
+    repopulating lists reuses decoded icons and cards instead of reading and decoding them again.
+    The size of an entry is its uncompressed size in memory.
+    """
+
+    def __init__(self, budget: int = DEFAULT_BUDGET):
+        self.__entries = OrderedDict()
+        self.__budget = budget
+        self.__size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.__entries
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    @property
+    def budget(self) -> int:
+        return self.__budget
+
+    @budget.setter
+    def budget(self, val: int):
+        self.__budget = val
+        self.__evict()
+
+    @property
+    def size(self) -> int:
+        """bytes held by the cached images"""
+        return self.__size
+
+    @property
+    def stats(self) -> dict:
+        return {"entries": len(self), "size": self.size, "budget": self.budget, "hits": self.hits,
+                "misses": self.misses}
+
+    @staticmethod
+    def image_bytes(image: Union[QtGui.QPixmap, QtGui.QImage]) -> int:
+        return image.width() * image.height() * image.depth() // 8
+
+    def get(self, key: Hashable) -> Optional[Union[QtGui.QPixmap, QtGui.QImage]]:
+        """returns the cached image and marks it as recently used, None on a miss"""
+        image = self.__entries.get(key)
+        if image is None:
+            self.misses += 1
+            return None
+        self.__entries.move_to_end(key)
+        self.hits += 1
+        return image
+
+    def put(self, key: Hashable, image: Union[QtGui.QPixmap, QtGui.QImage]):
+        """caches an image, evicting the least recently used ones beyond the budget"""
+        size = self.image_bytes(image)
+        self.remove(key)
+        if size > self.__budget:
+            # caching it would only flush everything else
+            return
+        self.__entries[key] = image
+        self.__size += size
+        self.__evict()
+
+    def remove(self, key: Hashable):
+        image = self.__entries.pop(key, None)
+        if image is not None:
+            self.__size -= self.image_bytes(image)
+
+    def clear(self):
+        self.__entries.clear()
+        self.__size = 0
+
+    def __evict(self):
+        while self.__size > self.__budget and self.__entries:
+            _, image = self.__entries.popitem(last=False)
+            self.__size -= self.image_bytes(image)
+
+
+PIXMAP_CACHE = PixmapCache()
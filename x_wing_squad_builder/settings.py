@@ -5,6 +5,8 @@ from pathlib import Path
 
 from PySide6 import QtCore
 
+from .model.settings_snapshot import Mode, SettingsSnapshot, SETTINGS
+
 
 class Settings:
 
@@ -22,6 +24,7 @@ class Settings:
         THEME = "theme"
         MODE = "mode"
         SCALE = "scale"
+        IMAGE_CACHE_SIZE = "image_cache_size"
 
         def __str__(self) -> str:
             return self.value
@@ -33,22 +36,39 @@ class Settings:
         def __str__(self) -> str:
             return self.value
 
-    class Mode(Enum):
-        STANDARD = "Standard"
-        EPIC = "Epic"
-        FREEDOM = "Freedom"
-    
+    Mode = Mode
+
     defaults = {
         Key.LOG_FILE_DIR: Path(os.getenv("LOCALAPPDATA")) / organization_name / application_name,
         Key.THEME: Theme.LIGHT,
         Key.MODE: Mode.STANDARD,
         Key.SCALE: 1,
+        # megabytes of decoded images kept in memory
+        Key.IMAGE_CACHE_SIZE: 128,
     }
 
+    __snapshot_loaded = False
+    __broadcaster = None
+
     def __init__(self, scope=QtCore.QSettings.UserScope):
         self.__q_settings = QtCore.QSettings(
             scope, self.organization_name, self.application_name)
 
+    @classmethod
+    def snapshot(cls) -> "SettingsSnapshot":
+        """returns the model's shared settings snapshot, read from QSettings on first use"""
+        if not cls.__snapshot_loaded:
+            SETTINGS.refresh(cls())
+            cls.__snapshot_loaded = True
+        return SETTINGS
+
+    @classmethod
+    def broadcaster(cls) -> "SettingsBroadcaster":
+        """returns the object broadcasting settings_changed with the refreshed snapshot"""
+        if cls.__broadcaster is None:
+            cls.__broadcaster = SettingsBroadcaster()
+        return cls.__broadcaster
+
     def clear(self):
         self.q_settings.clear()
 
@@ -95,3 +115,15 @@ class Settings:
     @scale.setter
     def scale(self, val: float):
         self.q_settings.setValue(self.Key.SCALE.value, val)
+
+    @property
+    def image_cache_size(self) -> int:
+        return int(self.q_settings.value(self.Key.IMAGE_CACHE_SIZE.value, self.defaults[self.Key.IMAGE_CACHE_SIZE]))
+
+    @image_cache_size.setter
+    def image_cache_size(self, val: int):
+        self.q_settings.setValue(self.Key.IMAGE_CACHE_SIZE.value, val)
+
+
+class SettingsBroadcaster(QtCore.QObject):
+    settings_changed = QtCore.Signal(object)
@@ -54,6 +54,9 @@ class SettingsWindow(QtWidgets.QDialog):
                 'An format error occured while attempting to save settings')
         else:
             logging.info('Settings saved successfully')
+            snapshot = Settings.snapshot()
+            snapshot.refresh(self.settings)
+            Settings.broadcaster().settings_changed.emit(snapshot)
             self.saved_signal.emit()
 
     def restore_defaults(self):
@@ -99,3 +102,11 @@ class SettingsWindow(QtWidgets.QDialog):
     @scale.setter
     def scale(self, val: float):
         self.ui.scale_double_spin_box.setValue(val)
+
+    @property
+    def image_cache_size(self) -> int:
+        return self.ui.image_cache_size_spin_box.value()
+
+    @image_cache_size.setter
+    def image_cache_size(self, val: int):
+        self.ui.image_cache_size_spin_box.setValue(val)
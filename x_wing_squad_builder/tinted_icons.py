@@ -0,0 +1,84 @@
+"""
+Tinted variants of the action and upgrade slot icons.
+
+Red, purple and green icons are the white icons with color channels masked out.  Instead of doing that
+image math whenever an icon is shown, every variant is written once next to the resources, e.g.
+resources/tinted/actions/focus_red.png, either by `python setup.py build_icons` or on first use.  A variant
+is written again when its source icon is newer.  If the resources are read only, tinting falls back to
+memory and the pixmap cache keeps the result.
+
+    python -m x_wing_squad_builder.tinted_icons [resources dir]
+"""
+import logging
+import sys
+from pathlib import Path
+
+from PIL import Image
+import numpy as np
+
+from typing import Optional
+
+from .utils import atomic_write_path
+
+TINT_COLORS = ["red", "purple", "green"]
+TINTED_DIR_NAME = "tinted"
+# resource directories holding icons that are shown tinted
+ICON_DIRS = ["actions", "upgrade_slots"]
+DEFAULT_RESOURCES_DIR = Path(__file__).parents[1] / "data" / "resources"
+
+
+def tint_image(image: Image.Image, color: str) -> Image.Image:
+    """returns the icon in the color, unknown colors leave it unchanged"""
+    im_arr = np.array(image).astype('uint8')
+    if color == "red":
+        im_arr[im_arr[:, :, 0] > 0, 1] = 0
+        im_arr[im_arr[:, :, 0] > 0, 2] = 0
+    elif color == "purple":
+        im_arr[im_arr[:, :, 0] > 0, 1] = 0
+    elif color == "green":
+        im_arr[im_arr[:, :, 0] > 0, 0] = 0
+        im_arr[im_arr[:, :, 0] > 0, 2] = 0
+    return Image.fromarray(im_arr)
+
+
+def tinted_icon_path(image_path: Path, color: str) -> Path:
+    """returns where the tinted variant of resources/<icon dir>/<icon> is stored"""
+    image_path = Path(image_path)
+    tinted_name = f"{image_path.stem}_{color}{image_path.suffix}"
+    return image_path.parents[1] / TINTED_DIR_NAME / image_path.parent.name / tinted_name
+
+
+def tinted_icon(image_path: Path, color: str) -> Optional[Path]:
+    """
+    returns the path of the tinted variant of an icon, writing it first if it is missing or outdated.
+    returns None if the icon does not exist or the variant cannot be written.
+    """
+    image_path = Path(image_path)
+    tinted_path = tinted_icon_path(image_path, color)
+    try:
+        source_mtime = image_path.stat().st_mtime
+        if tinted_path.exists() and tinted_path.stat().st_mtime >= source_mtime:
+            return tinted_path
+        tinted_path.parent.mkdir(parents=True, exist_ok=True)
+        with Image.open(image_path) as image, atomic_write_path(tinted_path) as tmp_path:
+            tint_image(image, color).save(tmp_path)
+    except OSError as e:
+        logging.debug(f"Unable to write tinted icon {tinted_path}: {e}")
+        return None
+    return tinted_path
+
+
+def build_tinted_icons(resources_dir: Path = DEFAULT_RESOURCES_DIR) -> int:
+    """writes every missing or outdated tinted icon variant, returns the number of variants available"""
+    count = 0
+    for icon_dir in ICON_DIRS:
+        for image_path in sorted((Path(resources_dir) / icon_dir).glob("*.png")):
+            for color in TINT_COLORS:
+                if tinted_icon(image_path, color) is not None:
+                    count += 1
+    return count
+
+
+if __name__ == "__main__":
+    resources_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_RESOURCES_DIR
+    print(f"{build_tinted_icons(resources_dir)} tinted icons in {resources_dir / TINTED_DIR_NAME}")
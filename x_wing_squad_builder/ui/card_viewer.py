@@ -1,10 +1,21 @@
 from PySide6 import QtWidgets, QtCore, QtGui
 
+from ..settings import Settings
+
 # Thanks to https://stackoverflow.com/questions/35508711/how-to-enable-pan-and-zoom-in-a-qgraphicsview
 
 
 class CardViewer(QtWidgets.QGraphicsView):
+    """
+    Shows a card, or two side by side, zoomable with the mouse wheel.
+
+    Cards may be downscaled levels shown at full size (see card_pyramid), picked from the scale setting and
+    zoom.  sharper_card_needed is emitted when a card is shown at a higher resolution than it holds, e.g.
+    after zooming in, the owner should then load it again at card_resolution and swap it in with
+    replace_card or replace_second_card.
+    """
     card_clicked = QtCore.Signal(QtCore.QPoint)
+    sharper_card_needed = QtCore.Signal()
 
     def __init__(self, parent):
         super(CardViewer, self).__init__(parent)
@@ -28,11 +39,16 @@ class CardViewer(QtWidgets.QGraphicsView):
     def has_card(self):
         return not self._empty
 
+    @property
+    def card_resolution(self) -> float:
+        """the fraction of the full resolution of a card needed to show it sharply at the current zoom"""
+        return self.transform().m11() * self.devicePixelRatioF() / Settings.snapshot().scale
+
     def fitInView(self, scale=False):
-        p1pixmap = self._photo.pixmap()
-        p2pixmap = self._second_photo.pixmap()
-        test_rect = QtCore.QRect(-20, -20, p1pixmap.width() + p2pixmap.width()+25, p1pixmap.height() + 25)
-        rect = QtCore.QRectF(test_rect)
+        # cards are laid out at their full size, whatever level of a card is shown
+        p1size = self._photo.pixmap().deviceIndependentSize()
+        p2size = self._second_photo.pixmap().deviceIndependentSize()
+        rect = QtCore.QRectF(-20, -20, p1size.width() + p2size.width() + 25, p1size.height() + 25)
         if not rect.isNull():
             self.setSceneRect(rect)
             if self.has_card:
@@ -44,6 +60,16 @@ class CardViewer(QtWidgets.QGraphicsView):
                 # factor = min(viewrect.width() / scenerect.width(), viewrect.height() / scenerect.height())
                 # self.scale(factor, factor)
             self._zoom = 0
+            self.request_sharper_card()
+
+    def request_sharper_card(self):
+        """emits sharper_card_needed if a card holds less resolution than it is shown at"""
+        needed = min(self.card_resolution, 1.0)
+        for photo in (self._photo, self._second_photo):
+            pixmap = photo.pixmap()
+            if not pixmap.isNull() and pixmap.devicePixelRatio() / Settings.snapshot().scale < needed - 1e-6:
+                self.sharper_card_needed.emit()
+                return
 
     def set_card(self, pixmap: QtGui.QPixmap = None):
         self._zoom = 0
@@ -69,6 +95,20 @@ class CardViewer(QtWidgets.QGraphicsView):
             self._second_photo.setPixmap(QtGui.QPixmap())
         self.fitInView()
 
+    def replace_card(self, pixmap: QtGui.QPixmap = None):
+        """swaps in another level of the card, keeping the zoom"""
+        if self._photo.pixmap().isNull():
+            self.set_card(pixmap)
+        elif pixmap and not pixmap.isNull():
+            self._photo.setPixmap(pixmap)
+
+    def replace_second_card(self, pixmap: QtGui.QPixmap = None):
+        """swaps in another level of the second card, keeping the zoom"""
+        if self._second_photo.pixmap().isNull():
+            self.add_card(pixmap)
+        elif pixmap and not pixmap.isNull():
+            self._second_photo.setPixmap(pixmap)
+
     def wheelEvent(self, event):
         if self.has_card:
             if event.angleDelta().y() > 0:
@@ -79,6 +119,7 @@ class CardViewer(QtWidgets.QGraphicsView):
                 self._zoom -= 1
             if self._zoom > 0:
                 self.scale(factor, factor)
+                self.request_sharper_card()
             elif self._zoom == 0:
                 self.fitInView()
             else:
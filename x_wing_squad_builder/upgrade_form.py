@@ -5,9 +5,9 @@ from .utils import prettify_definition_form_entry
 from .utils_pyside import detect_pyside_widget, arr_to_comma_separated_list, set_low_high, set_line_edit, parse_actions, parse_check_box
 
 from .definition_form import DefinitionForm
+from .data_repository import DataRepository
 
 import logging
-from pathlib import Path
 
 from typing import List, Optional, Union, Dict
 
@@ -18,12 +18,12 @@ class UpgradeForm(QtWidgets.QDialog):
     update_signal = QtCore.Signal(dict)
     update_form_closed_signal = QtCore.Signal()
 
-    def __init__(self, data_filepath: Path, parent=None):
+    def __init__(self, repository: DataRepository, parent=None):
         super().__init__(parent)
         self.ui = Ui_UpgradeForm()
         self.ui.setupUi(self)
 
-        self.data_filepath = data_filepath
+        self.repository = repository
         self.checkboxes = detect_pyside_widget(
             self.ui.verticalLayout, QtWidgets.QCheckBox)
 
@@ -46,7 +46,7 @@ class UpgradeForm(QtWidgets.QDialog):
     @property
     def ship_names(self) -> List[str]:
         """This looks for ships already entered to check against upgrades, and uses the ship_icons directory as the source of truth."""
-        ship_filepath = self.data_filepath.parent / "resources" / "ship_icons"
+        ship_filepath = self.repository.data_path.parent / "resources" / "ship_icons"
         ship_icon_paths = ship_filepath.glob("**/*")
         ship_names = [path.stem.lower() for path in ship_icon_paths]
         return ship_names
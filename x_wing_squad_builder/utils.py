@@ -1,28 +1,13 @@
 import json
+import os
 import re
+import tempfile
 from _ctypes import PyObj_FromPtr
 import argparse
+from contextlib import contextmanager
+from pathlib import Path
 
-from typing import List
-
-from PIL import Image
-import numpy as np
-
-from PySide6.QtGui import QImage
-
-
-def change_action_image_color(image_path, color) -> QImage:
-    im = Image.open(image_path)
-    im_arr = np.array(im).astype('uint8')
-    if color == "red":
-        im_arr[im_arr[:, :, 0] > 0, 1] = 0
-        im_arr[im_arr[:, :, 0] > 0, 2] = 0
-    elif color == "purple":
-        im_arr[im_arr[:, :, 0] > 0, 1] = 0
-    elif color == "green":
-        im_arr[im_arr[:, :, 0] > 0, 0] = 0
-        im_arr[im_arr[:, :, 0] > 0, 2] = 0
-    return Image.fromarray(im_arr).toqimage()
+from typing import Iterator, List
 
 
 def contains_number(text):
@@ -85,6 +70,40 @@ def get_pilot_name_from_list_item_text(text: str):
     return pilot_name
 
 
+def neighbour_indices(index: int, length: int, distance: int) -> List[int]:
+    """returns the indices up to distance away from index within range(length), nearest first, next before previous"""
+    indices = []
+    for offset in range(1, distance + 1):
+        for neighbour in (index + offset, index - offset):
+            if 0 <= neighbour < length:
+                indices.append(neighbour)
+    return indices
+
+
+@contextmanager
+def atomic_write_path(path: Path) -> Iterator[Path]:
+    """
+    yields a temporary path next to path and moves it over path once the block succeeds, so a partly written
+    file is never picked up.  every writer gets a file of its own, concurrent writers do not clash.
+    the temporary file is removed if the block or the move fails.
+    """
+    path = Path(path)
+    # keep the suffix, e.g. PIL picks the image format from it
+    fd, tmp_name = tempfile.mkstemp(prefix=f"{path.stem}.", suffix=f".tmp{path.suffix}", dir=path.parent)
+    os.close(fd)
+    try:
+        # mkstemp makes the file private to the owner
+        os.chmod(tmp_name, 0o644)
+        yield Path(tmp_name)
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.remove(tmp_name)
+        except OSError:
+            pass
+        raise
+
+
 def get_upgrade_slot_from_list_item_text(text: str):
     """returns lowercase version of the text selected"""
     upgrade_name = text.lower()
@@ -4,10 +4,19 @@ from PySide6 import QtWidgets, QtGui
 from typing import List, Optional, Dict
 import logging
 
-from .utils import change_action_image_color, gui_text_encode
+from PIL import Image
+
+from .utils import gui_text_encode, neighbour_indices
 from .model.ship import Ship
 
 from .settings import Settings
+from .pixmap_cache import PIXMAP_CACHE
+from .tinted_icons import tint_image, tinted_icon
+
+
+def change_action_image_color(image_path, color) -> QtGui.QImage:
+    """tints an icon in memory, see tinted_icon for the variants stored on disk"""
+    return tint_image(Image.open(image_path), color).toqimage()
 
 
 def parse_attacks(attacks_line_edit: QtWidgets.QLineEdit, arc_types_line_edit: QtWidgets.QLineEdit, statistics: dict):
@@ -73,16 +82,76 @@ def treewidget_item_is_top_level(item: QtWidgets.QTreeWidgetItem):
     return True
 
 
+def pixmap_cache_key(image_path: Path, color=None) -> tuple:
+    """
+    images are shown at the device pixel ratio of the user's scale setting rather than the screen's,
+    so the setting is part of the key and changing it gives new pixmaps instead of wrongly sized ones.
+    """
+    return str(image_path), color, Settings.snapshot().scale
+
+
+def cached_qpixmap(image_path: Path, color=None) -> Optional[QtGui.QPixmap]:
+    """returns the image from the shared pixmap cache, None if it is not cached"""
+    pixmap = PIXMAP_CACHE.get(pixmap_cache_key(image_path, color))
+    if pixmap is None:
+        return None
+    # a shallow copy, so callers changing their pixmap do not change the cached one
+    return QtGui.QPixmap(pixmap)
+
+
+def cache_qimage(image_path: Path, qimage: QtGui.QImage, color=None, resolution: float = 1.0) -> QtGui.QPixmap:
+    """
+    converts a decoded image to a pixmap and caches it, only call this from the GUI thread.
+    resolution is the fraction of the full resolution a downscaled image holds, it is shown at full size.
+    """
+    key = pixmap_cache_key(image_path, color)
+    pixmap = QtGui.QPixmap.fromImage(qimage)
+    pixmap.setDevicePixelRatio(key[2] * resolution)
+    if not pixmap.isNull():
+        PIXMAP_CACHE.put(key, pixmap)
+    return QtGui.QPixmap(pixmap)
+
+
 def image_path_to_qpixmap(image_path: Path, color=None) -> QtGui.QPixmap:
+    """returns the image as a pixmap, decoded images are kept in the shared pixmap cache"""
+    pixmap = cached_qpixmap(image_path, color)
+    if pixmap is not None:
+        return pixmap
     if color is not None:
-        qimage = change_action_image_color(image_path, color)
+        tinted_path = tinted_icon(image_path, color)
+        if tinted_path is not None:
+            qimage = QtGui.QImage(str(tinted_path))
+        else:
+            qimage = change_action_image_color(image_path, color)
     else:
         qimage = QtGui.QImage(image_path)
-    pixmap = QtGui.QPixmap.fromImage(qimage)
-
-    pixmap.setDevicePixelRatio(Settings().scale)
-
-    return pixmap
+    return cache_qimage(image_path, qimage, color)
+
+
+def list_widget_neighbours(list_widget: QtWidgets.QListWidget, distance: int) -> List[QtWidgets.QListWidgetItem]:
+    """returns the items around the selected item, nearest first"""
+    selected = list_widget.selectedItems()
+    if not selected:
+        return []
+    rows = neighbour_indices(list_widget.row(selected[0]), list_widget.count(), distance)
+    return [list_widget.item(row) for row in rows]
+
+
+def tree_widget_neighbours(tree_widget: QtWidgets.QTreeWidget, item: QtWidgets.QTreeWidgetItem,
+                           distance: int) -> List[QtWidgets.QTreeWidgetItem]:
+    """returns the visible leaf items above and below an item, nearest first"""
+    below = []
+    above = []
+    for neighbours, step in ((below, tree_widget.itemBelow), (above, tree_widget.itemAbove)):
+        neighbour = step(item)
+        while neighbour is not None and len(neighbours) < distance:
+            if neighbour.childCount() == 0:
+                neighbours.append(neighbour)
+            neighbour = step(neighbour)
+    items = []
+    for i in range(distance):
+        items.extend(neighbours[i] for neighbours in (below, above) if i < len(neighbours))
+    return items
 
 
 def populate_list_widget(arr: List[str], list_widget: QtWidgets.QListWidget, image_path: Optional[Path] = None) -> None:
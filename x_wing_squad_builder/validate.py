@@ -0,0 +1,188 @@
+"""
+Bulk squad validation.
+
+Validates and prices squad specifications (see model.squad_spec) against the definition file, spread over
+a pool of worker processes, and writes one JSON report per squad:
+
+    python -m x_wing_squad_builder.validate squads/ --max-points 200 > report.jsonl
+    cat squads.jsonl | python -m x_wing_squad_builder.validate - --mode epic
+
+Inputs are directories of .json files (one squad or a list of squads per file), .json files, or JSON-lines
+files / streams ('-' reads stdin) with one squad per line.  Throughput statistics are written to stderr.
+
+Squads are read and validated in a stream: at most two chunks of squads per worker are in flight, so memory
+stays flat however long the input is.  Malformed JSON and unreadable files are reported as invalid squads,
+they do not stop the run.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from typing import Iterable, Iterator, List, Optional, Union
+
+from .model.settings_snapshot import Mode, SETTINGS
+from .model.squad_spec import validate_squad
+from .model.upgrade import Upgrades
+from .model.xwing import XWing
+
+DEFAULT_DEFINITION_PATH = Path(__file__).parents[1] / "data" / "definition.json"
+
+# catalog of each worker process, loaded once by init_worker
+_catalog = None
+
+
+def init_worker(definition_path: Path, mode: Mode, max_points: Optional[int]):
+    global _catalog
+    SETTINGS.mode = mode
+    xwing = XWing.launch_xwing_data(definition_path)
+    _catalog = (xwing, Upgrades(xwing.upgrades), max_points)
+
+
+def invalid_report(name: Optional[str], error: str) -> dict:
+    return {"name": name, "valid": False, "points": None, "errors": [error]}
+
+
+def validate_spec(spec: Union[dict, ValueError]) -> dict:
+    """returns the report of a squad specification, or of the error reading it"""
+    if isinstance(spec, ValueError):
+        return invalid_report(None, str(spec))
+    xwing, upgrades, max_points = _catalog
+    try:
+        return validate_squad(spec, xwing, upgrades, max_points)
+    except Exception as e:
+        # a malformed squad should not take the whole batch down
+        return invalid_report(spec.get("name") if isinstance(spec, dict) else None,
+                              f"Unable to validate squad: {e!r}")
+
+
+def validate_specs(specs: List[Union[dict, ValueError]]) -> List[dict]:
+    return [validate_spec(spec) for spec in specs]
+
+
+def read_json_lines(lines: Iterable[str], source: str) -> Iterator[Union[dict, ValueError]]:
+    """yields the squad of every line, or a ValueError for a line that is not valid JSON"""
+    for line_number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            yield ValueError(f"Invalid JSON on line {line_number} of {source}: {e}")
+
+
+def read_json_file(path: Path) -> Iterator[Union[dict, ValueError]]:
+    """yields the squads of a file, or a ValueError if it cannot be read or is not valid JSON"""
+    try:
+        with open(path, encoding="utf-8") as file:
+            if path.suffix == ".jsonl":
+                yield from read_json_lines(file, str(path))
+                return
+            data = json.load(file)
+    except json.JSONDecodeError as e:
+        yield ValueError(f"Invalid JSON in {path}: {e}")
+        return
+    except OSError as e:
+        yield ValueError(f"Unable to read {path}: {e.strerror or e}")
+        return
+    except UnicodeDecodeError as e:
+        yield ValueError(f"Unable to read {path}: {e}")
+        return
+    yield from data if isinstance(data, list) else [data]
+
+
+def read_specs(sources: List[str]) -> Iterator[Union[dict, ValueError]]:
+    """yields the squad specifications of every source lazily, a ValueError in place of unreadable ones"""
+    for source in sources:
+        if source == "-":
+            yield from read_json_lines(sys.stdin, "stdin")
+            continue
+        path = Path(source)
+        if path.is_dir():
+            for file_path in sorted(list(path.glob("*.json")) + list(path.glob("*.jsonl"))):
+                yield from read_json_file(file_path)
+        else:
+            yield from read_json_file(path)
+
+
+def create_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m x_wing_squad_builder.validate",
+        description="Validate and price squads, one JSON report per line.")
+    parser.add_argument("sources", nargs="+",
+                        help="directories, .json or .jsonl files of squads, '-' reads JSON lines from stdin")
+    parser.add_argument("--definition", type=Path, default=DEFAULT_DEFINITION_PATH,
+                        help="definition file to validate against")
+    parser.add_argument("--mode", choices=[mode.value.lower() for mode in Mode], default=Mode.STANDARD.value.lower(),
+                        help="game mode")
+    parser.add_argument("--max-points", type=int, default=None, help="squads above this cost are invalid")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes")
+    parser.add_argument("--chunksize", type=int, default=64, help="squads sent to a worker at a time")
+    parser.add_argument("-o", "--output", type=Path, default=None, help="report file, defaults to stdout")
+    return parser
+
+
+def chunks(items: Iterable, size: int) -> Iterator[list]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = create_parser()
+    options = parser.parse_args(argv)
+    mode = Mode(options.mode.capitalize())
+    workers = options.workers or os.cpu_count() or 1
+    try:
+        output = open(options.output, "w", encoding="utf-8") if options.output else sys.stdout
+    except OSError as e:
+        parser.error(f"unable to write {options.output}: {e.strerror or e}")
+
+    start = time.perf_counter()
+    # build the catalog cache once, instead of every worker building and writing it on a cold cache
+    XWing.launch_xwing_data(options.definition)
+    total = 0
+    valid = 0
+
+    def write_reports(reports: List[dict]):
+        nonlocal total, valid
+        for report in reports:
+            output.write(json.dumps(report) + "\n")
+            total += 1
+            valid += report["valid"]
+        output.flush()
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                 initargs=(options.definition, mode, options.max_points)) as executor:
+            # reports are written in input order as soon as the oldest chunk is done
+            in_flight = deque()
+            for chunk in chunks(read_specs(options.sources), options.chunksize):
+                if len(in_flight) >= 2 * workers:
+                    write_reports(in_flight.popleft().result())
+                in_flight.append(executor.submit(validate_specs, chunk))
+            while in_flight:
+                write_reports(in_flight.popleft().result())
+    finally:
+        if options.output:
+            output.close()
+
+    elapsed = time.perf_counter() - start
+    rate = total / elapsed if elapsed > 0 else 0
+    print(f"{total} squads validated in {elapsed:.2f}s ({rate:.0f} squads/s): "
+          f"{valid} valid, {total - valid} invalid", file=sys.stderr)
+    return 0 if valid == total else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,10 +7,14 @@ from .ui.viewer_dialog_ui import Ui_Viewer
 from .model import Upgrades
 from .model import XWing
 from .model import Squad
+from .model.eligibility import EligibilityMatrix
+from .settings import Settings
+from .data_repository import DataRepository
 
-from .utils_pyside import image_path_to_qpixmap, treewidget_item_is_top_level, gui_text_encode
+from .utils_pyside import image_path_to_qpixmap, treewidget_item_is_top_level, gui_text_encode, tree_widget_neighbours
 from .utils import get_upgrade_name_from_list_item_text, prettify_name, get_pilot_name_from_list_item_text
 from .ui.card_viewer import CardViewer
+from .card_loader import CardLoader, PREFETCH_DISTANCE
 
 from PySide6 import QtWidgets, QtGui, QtCore
 
@@ -21,13 +25,20 @@ class Viewer(QtWidgets.QDialog):
     upgrade_edit_signal = QtCore.Signal(str)
     pilot_edit_signal = QtCore.Signal(str, str, str)
 
-    def __init__(self, xwing: XWing, upgrades: Upgrades, upgrade_slots_dir: Path, upgrades_dir: Path,
-                 factions_dir: Path, ship_icons_dir: Path, pilots_dir: Path, parent=None):
+    def __init__(self, repository: DataRepository, upgrade_slots_dir: Path, upgrades_dir: Path,
+                 factions_dir: Path, ship_icons_dir: Path, pilots_dir: Path, parent=None,
+                 card_loader: Optional[CardLoader] = None):
         super().__init__(parent)
         self.ui = Ui_Viewer()
         self.ui.setupUi(self)
 
-        self.upgrades = upgrades
+        if card_loader is None:
+            card_loader = CardLoader(QtCore.QThreadPool.globalInstance(), self)
+        self.card_loader = card_loader
+
+        self.repository = repository
+        self.repository.data_changed.connect(self.refresh)
+        self.__eligibility: Optional[EligibilityMatrix] = None
         self.upgrade_slots_dir = upgrade_slots_dir
         self.upgrades_dir = upgrades_dir
         self.factions_dir = factions_dir
@@ -47,10 +58,9 @@ class Viewer(QtWidgets.QDialog):
         self.ui.upgrade_filter_line_edit.textChanged.connect(self.filter_items)
         self.ui.pilot_filter_line_edit.textChanged.connect(self.filter_items)
 
-        self.xwing = xwing
-
         self.populate_upgrade_viewer()
         self.upgrade_viewer = CardViewer(self)
+        self.upgrade_viewer.sharper_card_needed.connect(partial(self.sharpen_card, self.upgrade_viewer))
         self.add_card_viewer(
             self.upgrade_viewer, self.ui.upgrade_viewer_tree_widget, self.ui.upgrade_layout)
 
@@ -59,11 +69,64 @@ class Viewer(QtWidgets.QDialog):
 
         self.populate_pilot_viewer()
         self.pilot_viewer = CardViewer(self)
+        self.pilot_viewer.sharper_card_needed.connect(partial(self.sharpen_card, self.pilot_viewer))
         self.add_card_viewer(
             self.pilot_viewer, self.ui.pilot_viewer_tree_widget, self.ui.pilot_layout)
 
         self.ui.squad_text_edit.setReadOnly(True)
 
+    @property
+    def xwing(self) -> XWing:
+        return self.repository.xwing
+
+    @property
+    def upgrades(self) -> Upgrades:
+        return self.repository.upgrades
+
+    @property
+    def eligibility(self) -> EligibilityMatrix:
+        """the eligibility matrix of the catalog in the current game mode, built on first use"""
+        mode = Settings.snapshot().mode
+        if self.__eligibility is None or self.__eligibility.mode != mode:
+            self.__eligibility = EligibilityMatrix.from_catalog(self.xwing, self.upgrades.upgrades_list, mode)
+        return self.__eligibility
+
+    def showEvent(self, event: QtGui.QShowEvent):
+        self.set_eligibility_tool_tips()
+        super().showEvent(event)
+
+    def refresh(self):
+        self.__eligibility = None
+        self.populate_upgrade_viewer()
+        self.populate_pilot_viewer()
+        if self.isVisible():
+            self.set_eligibility_tool_tips()
+
+    def set_eligibility_tool_tips(self):
+        """shows how many upgrades each pilot can equip and how many pilots can equip each upgrade"""
+        upgrade_counts = self.eligibility.eligible_counts()
+        pilot_counts = self.eligibility.eligible_pilot_counts()
+        item_iterator = QtWidgets.QTreeWidgetItemIterator(
+            self.ui.upgrade_viewer_tree_widget, QtWidgets.QTreeWidgetItemIterator.NoChildren)
+        while item_iterator.value():
+            item = item_iterator.value()
+            count = pilot_counts.get(get_upgrade_name_from_list_item_text(item.text(0)))
+            if count is not None:
+                item.setToolTip(0, f"{count} pilots can equip this upgrade")
+            item_iterator += 1
+        item_iterator = QtWidgets.QTreeWidgetItemIterator(
+            self.ui.pilot_viewer_tree_widget, QtWidgets.QTreeWidgetItemIterator.NoChildren)
+        while item_iterator.value():
+            item = item_iterator.value()
+            ship_item = item.parent()
+            if ship_item is not None and ship_item.parent() is not None:
+                key = (gui_text_encode(ship_item.parent().text(0)), gui_text_encode(ship_item.text(0)),
+                       get_pilot_name_from_list_item_text(item.text(0)))
+                count = upgrade_counts.get(key)
+                if count is not None:
+                    item.setToolTip(0, f"{count} upgrades available to this pilot")
+            item_iterator += 1
+
     def populate_upgrade_viewer(self):
         # populate upgrade viewer
         self.ui.upgrade_viewer_tree_widget.clear()
@@ -172,9 +235,12 @@ class Viewer(QtWidgets.QDialog):
         if treewidget_item_is_top_level(item):
             return
         upgrade_name = get_upgrade_name_from_list_item_text(item.text(0))
-        pixmap = image_path_to_qpixmap(
-            self.upgrades_dir / f"{upgrade_name}.jpg")
-        self.upgrade_viewer.set_card(pixmap)
+        self.card_loader.load(self.upgrade_viewer, self.upgrades_dir / f"{upgrade_name}.jpg",
+                              self.upgrade_viewer.set_card, self.upgrade_viewer.card_resolution)
+        self.card_loader.prefetch(
+            [self.upgrades_dir / f"{get_upgrade_name_from_list_item_text(neighbour.text(0))}.jpg"
+             for neighbour in tree_widget_neighbours(self.ui.upgrade_viewer_tree_widget, item, PREFETCH_DISTANCE)],
+            self.upgrade_viewer.card_resolution)
 
     def handle_pilot_tree_click(self):
         item = self.ui.pilot_viewer_tree_widget.selectedItems()[0]
@@ -183,8 +249,15 @@ class Viewer(QtWidgets.QDialog):
         if treewidget_item_is_top_level(item):
             return
         pilot_name = get_pilot_name_from_list_item_text(item.text(0))
-        pixmap = image_path_to_qpixmap(self.pilots_dir / f"{pilot_name}.jpg")
-        self.pilot_viewer.set_card(pixmap)
+        self.card_loader.load(self.pilot_viewer, self.pilots_dir / f"{pilot_name}.jpg", self.pilot_viewer.set_card,
+                              self.pilot_viewer.card_resolution)
+        self.card_loader.prefetch(
+            [self.pilots_dir / f"{get_pilot_name_from_list_item_text(neighbour.text(0))}.jpg"
+             for neighbour in tree_widget_neighbours(self.ui.pilot_viewer_tree_widget, item, PREFETCH_DISTANCE)],
+            self.pilot_viewer.card_resolution)
+
+    def sharpen_card(self, card_viewer: CardViewer):
+        self.card_loader.reload(card_viewer, card_viewer.replace_card, card_viewer.card_resolution)
 
     def expand_collapse_all(self, expand=True):
         if self.current_tree_widget is None:
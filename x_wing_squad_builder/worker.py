@@ -1,7 +1,9 @@
-from PySide6.QtCore import QObject, Signal, Slot, QRunnable
+from PySide6.QtCore import QObject, Signal, Slot, QRunnable, QThreadPool
 from sys import exc_info
 from traceback import print_exc, format_exc
 
+from typing import Set
+
 
 class WorkerSignals(QObject):
     '''
@@ -18,10 +20,14 @@ class WorkerSignals(QObject):
     result
         `object` data returned from processing, anything
 
+    progress
+        `int` items done, `int` total items (0 if unknown)
+
     '''
     finished = Signal()
     error = Signal(tuple)
     result = Signal(object)
+    progress = Signal(int, int)
 
 
 class Worker(QRunnable):
@@ -35,16 +41,31 @@ class Worker(QRunnable):
     :type callback: function
     :param args: Arguments to pass to the callback function
     :param kwargs: Keywords to pass to the callback function
+    :param report_progress: Also pass `progress_callback` (emits the progress signal) and
+                            `is_cancelled` (returns True once cancel was called) to the function
 
     '''
 
-    def __init__(self, fn, *args, **kwargs):
+    def __init__(self, fn, *args, report_progress=False, **kwargs):
         super(Worker, self).__init__()
         # Store constructor arguments (re-used for processing)
         self.fn = fn
         self.args = args
         self.kwargs = kwargs
         self.signals = WorkerSignals()
+        self.cancelled = False
+        if report_progress:
+            self.kwargs['progress_callback'] = self.signals.progress.emit
+            self.kwargs['is_cancelled'] = self.is_cancelled
+
+    def cancel(self):
+        '''
+        Asks the function to stop, it is up to the function to check is_cancelled.
+        '''
+        self.cancelled = True
+
+    def is_cancelled(self):
+        return self.cancelled
 
     @Slot()
     def run(self):
@@ -62,3 +83,15 @@ class Worker(QRunnable):
             self.signals.result.emit(result)
         finally:
             self.signals.finished.emit()
+
+
+def start_worker(threadpool: QThreadPool, worker: Worker, running: Set[Worker], priority: int = 0):
+    '''
+    Starts the worker on the thread pool and keeps it in running until it finished.
+
+    The worker and its signals stay alive until every signal was delivered, whatever the caller keeps.
+    finished is delivered on the thread the worker was made on, so running is only changed there.
+    '''
+    running.add(worker)
+    worker.signals.finished.connect(lambda: running.discard(worker))
+    threadpool.start(worker, priority)